@@ -0,0 +1,136 @@
+import itertools
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from cache import mirrorPath, sharedTray
+from puzzle import ALGORITHMS, IDASTAR_TABLE_SIZE, Puzzle, checkTray
+
+"""
+Batch solving of many trays. solveMany() returns a SolveResult for every input tray, in the
+order of the input, and iterSolveMany() yields them one by one while reading the input lazily,
+so that any number of trays can be piped through it.
+The trays are read in chunks, packed into integers (see Puzzle.encodeTray()) and solved in a
+pool of worker processes, one task per chunk and tray length. A tray that appears more than
+once, or whose mirror image has already been seen with an algorithm finding a minimum cost path
+(see cache.py), is only solved once and its result is shared by all its occurrences. A SolutionCache can be given to reuse the solutions
+of earlier batches.
+Heuristics have to be given by name, as they are sent to the worker processes.
+"""
+
+# Result of solving one tray. 'path' holds the states from the input to a goal as strings;
+# it is None, as is 'cost', when no goal can be reached. 'time' is the time taken to solve
+# the tray in seconds.
+SolveResult = namedtuple('SolveResult', ['tray', 'path', 'cost', 'expanded', 'time'])
+
+_codecs = {}                                                    #Tray length -> puzzle used to pack and unpack trays
+
+
+# Returns a puzzle used to pack and unpack the trays of length n
+def getCodec(n):
+    if n not in _codecs:
+        _codecs[n] = Puzzle(' ' + 'B' * (n - 1))
+    return _codecs[n]
+
+
+# Solves packed trays of length n and returns (path, cost, nodes expanded, seconds) for each.
+# This is the task run by the worker processes.
+def solveChunk(n, states, algorithm, max_hop, heuristic, table_size=IDASTAR_TABLE_SIZE):
+    codec = getCodec(n)
+    results = []
+    for state in states:
+        puzzle = Puzzle(codec.convertToString(state), max_hop, heuristic)
+        start = time.perf_counter()
+        path, cost = puzzle.solve(algorithm, table_size=table_size)
+        results.append((path, cost, puzzle.expanded, time.perf_counter() - start))
+    return results
+
+
+# Returns a future already holding the result of function(*args), used when no worker processes are used
+def solveNow(function, *args):
+    future = Future()
+    future.set_result(function(*args))
+    return future
+
+
+# Yields a SolveResult for every tray of 'configs', in the same order. 'workers' is the number of
+# worker processes (None for one per CPU, 0 to solve in the calling process). At most 'cache_size'
+# results are kept to answer repeated trays, and 'cache' is an optional SolutionCache which is
+# looked up before solving a tray and updated with the new solutions. The results found in it
+# have no nodes expanded and take no time. 'table_size' is the size of the transposition table of
+# IDA*.
+def iterSolveMany(configs, algorithm='astar', workers=None, max_hop=2, heuristic=None, chunk_size=256, cache_size=100000, cache=None,
+                  table_size=IDASTAR_TABLE_SIZE):
+    if algorithm not in ALGORITHMS:
+        raise ValueError('Unknown algorithm: ' + str(algorithm))
+
+    executor = ProcessPoolExecutor(workers) if workers != 0 else None
+    submit = executor.submit if executor is not None else solveNow
+    in_flight = 2 * (workers or os.cpu_count() or 1)
+    known = {}                                                  #Canonical tray -> result, None while it is being solved
+    pending = deque()                                           #(trays of a chunk, [(trays of a task, future)])
+
+    # Waits for the tasks of the oldest chunk and yields its results
+    def flush():
+        trays, tasks = pending.popleft()
+        for task_trays, future in tasks:
+            for tray, result in zip(task_trays, future.result()):
+                known[tray] = result
+                if cache is not None:
+                    cache.put(tray, result[0], result[1], algorithm, max_hop, heuristic)
+        for tray in trays:
+            canonical, mirrored = sharedTray(tray, algorithm)
+            result = known.get(canonical)
+            if result is None:
+                result = solveChunk(len(tray), [getCodec(len(tray)).encodeTray(canonical)], algorithm, max_hop, heuristic, table_size)[0]
+            path, cost, expanded, seconds = result
+            yield SolveResult(tray, mirrorPath(path) if mirrored else path, cost, expanded, seconds)
+        while len(known) > cache_size:
+            oldest = next(iter(known))
+            if known[oldest] is None:
+                break
+            del known[oldest]
+
+    try:
+        configs = iter(configs)
+        while True:
+            trays = [''.join(tray) for tray in itertools.islice(configs, chunk_size)]
+            if not trays:
+                break
+
+            groups = {}
+            for tray in trays:
+                checkTray(tray)
+                canonical = sharedTray(tray, algorithm)[0]
+                if canonical in known:
+                    continue
+                solution = cache.get(canonical, algorithm, max_hop, heuristic) if cache is not None else None
+                if solution is not None:
+                    known[canonical] = (solution[0], solution[1], 0, 0.0)
+                else:
+                    known[canonical] = None
+                    groups.setdefault(len(tray), []).append(canonical)
+
+            tasks = []
+            for n, group in groups.items():
+                codec = getCodec(n)
+                states = [codec.encodeTray(tray) for tray in group]
+                tasks.append((group, submit(solveChunk, n, states, algorithm, max_hop, heuristic, table_size)))
+            pending.append((trays, tasks))
+
+            while len(pending) > in_flight:
+                yield from flush()
+
+        while pending:
+            yield from flush()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+# Solves every tray of 'configs' and returns the list of their SolveResult, in the same order
+# (see iterSolveMany() for the arguments)
+def solveMany(configs, algorithm='astar', workers=None, max_hop=2, heuristic=None, chunk_size=256, cache_size=100000, cache=None,
+              table_size=IDASTAR_TABLE_SIZE):
+    return list(iterSolveMany(configs, algorithm, workers, max_hop, heuristic, chunk_size, cache_size, cache, table_size))
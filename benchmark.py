@@ -0,0 +1,248 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from distance_table import DistanceTable
+from heuristics import HEURISTICS
+from puzzle import Puzzle
+
+"""
+Benchmarks for the search algorithms of the puzzle.
+benchmarkAStar() measures how the number of nodes expanded per second by A* scales
+with the size of the board, using random initial states generated from a fixed seed.
+compareHeuristics() runs A* with every heuristic of heuristics.HEURISTICS on the same
+initial states and reports the nodes expanded and the time taken by each of them.
+runSuite() is the regression suite: it runs every solver of SOLVERS over the same corpus of
+random initial states and the reversed board per board size, plus the reversed board of the
+larger LARGE_SIZES, and records, for every run, the time taken
+(the best of several repeats, as a single solve takes well under a millisecond), the nodes
+expanded and generated, the peak memory allocated (measured with tracemalloc in a second,
+untimed run) and the cost found, checked against the minimum cost read from a DistanceTable.
+The results are saved as JSON, and compareResults() reports the regressions of a run against
+a saved baseline.
+"""
+
+# Solvers of the suite: name -> function solving a puzzle and returning the minimum cost found
+# (None if no goal is reachable)
+SOLVERS = {
+    'bfs': lambda puzzle: puzzle.solve('bfs')[1],
+    'astar': lambda puzzle: puzzle.solve('astar')[1],
+    'idastar': lambda puzzle: puzzle.solve('idastar')[1],
+    'bidirectional': lambda puzzle: puzzle.solve('bidirectional')[1],
+    'all_goals': lambda puzzle: min((cost for goal, cost, path in puzzle.generateAllGoals()), default=None),
+}
+
+# Default relative increase of each summary metric above which compareResults() reports a
+# regression. Time is noisy, the node counts are exact.
+TOLERANCES = {'time': 0.25, 'expanded': 0.0, 'generated': 0.0, 'peak_memory': 0.1}
+
+# Board sizes of the suite whose reversed board alone is added to the corpus: 8 + 8 tiles have
+# more states than the default transposition table of IDA* has slots
+LARGE_SIZES = (8,)
+
+# Solves taking longer than this many seconds are not repeated, as their time is not dominated by jitter
+REPEAT_LIMIT = 1.0
+
+# Smallest increase of the summed time, in seconds, reported as a regression whatever its
+# relative size, so that the jitter of short runs is not taken for a slowdown
+TIME_FLOOR = 0.05
+
+
+# Returns a random tray with 'tiles' black and 'tiles' white tiles and one empty space
+def randomTray(tiles, rng):
+    tray = list('B' * tiles + 'W' * tiles + ' ')
+    rng.shuffle(tray)
+    return ''.join(tray)
+
+
+# Runs A* over 'samples' random trays for every board size and returns one row
+# (tiles of each colour, nodes expanded, seconds, expansions per second) per size.
+# The time taken to build the heuristic is not included.
+def benchmarkAStar(sizes=(3, 4, 5, 6, 7), samples=20, seed=0, heuristic=None):
+    rows = []
+    for tiles in sizes:
+        rng = random.Random(seed)
+        expanded = 0
+        elapsed = 0.0
+        for _ in range(samples):
+            puzzle = Puzzle(randomTray(tiles, rng), heuristic=heuristic)
+            start = time.perf_counter()
+            puzzle.solveAStar()
+            elapsed += time.perf_counter() - start
+            expanded += puzzle.expanded
+        rows.append((tiles, expanded, elapsed, expanded / elapsed if elapsed > 0 else 0.0))
+    return rows
+
+
+# Returns one row (heuristic, tiles of each colour, nodes expanded, seconds) per heuristic and
+# board size, with every heuristic run on the same random trays.
+def compareHeuristics(sizes=(3, 4, 5, 6, 7), samples=20, seed=0):
+    rows = []
+    for name in HEURISTICS:
+        for tiles, expanded, elapsed, rate in benchmarkAStar(sizes, samples, seed, name):
+            rows.append((name, tiles, expanded, elapsed))
+    return rows
+
+
+# Returns the corpus of the suite: 'samples' random trays per board size, the same for a given
+# seed, and the reversed board of every size (all the black tiles left of the empty space and all
+# the white tiles right of it), on which IDA* re-expands the most transpositions. Only the
+# reversed board is added for the 'large_sizes'.
+def buildCorpus(sizes=(3, 4, 5), samples=10, seed=0, large_sizes=LARGE_SIZES):
+    corpus = []
+    for tiles in sizes:
+        rng = random.Random(seed)
+        corpus.extend((tiles, randomTray(tiles, rng)) for _ in range(samples))
+        corpus.append((tiles, 'B' * tiles + ' ' + 'W' * tiles))
+    for tiles in large_sizes:
+        corpus.append((tiles, 'B' * tiles + ' ' + 'W' * tiles))
+    return corpus
+
+
+# Runs every solver of 'solvers' over the corpus and returns one row (a dict) per solver and tray.
+# The time of a tray is the best of 'repeats' solves (a single one above REPEAT_LIMIT seconds). The peak memory is only measured with
+# 'memory', as tracemalloc slows the solvers down.
+def runSuite(solvers=tuple(SOLVERS), sizes=(3, 4, 5), samples=10, seed=0, max_hop=2, heuristic=None, memory=True, repeats=5,
+             large_sizes=LARGE_SIZES):
+    corpus = buildCorpus(sizes, samples, seed, large_sizes)
+    tables = {}                                                 #Tiles -> DistanceTable giving the reference costs
+    rows = []
+    for name in solvers:
+        solver = SOLVERS[name]
+        for tiles, tray in corpus:
+            if tiles not in tables:
+                tables[tiles] = DistanceTable.build(Puzzle(tray, max_hop))
+            reference = tables[tiles].getCost(tray)
+
+            elapsed = None
+            for _ in range(max(repeats, 1)):
+                puzzle = Puzzle(tray, max_hop, heuristic)
+                start = time.perf_counter()
+                cost = solver(puzzle)
+                seconds = time.perf_counter() - start
+                elapsed = seconds if elapsed is None else min(elapsed, seconds)
+                if seconds > REPEAT_LIMIT:
+                    break
+
+            peak = None
+            if memory:
+                tracemalloc.start()
+                solver(Puzzle(tray, max_hop, heuristic))
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            rows.append({'solver': name, 'tiles': tiles, 'tray': tray, 'time': elapsed,
+                         'expanded': puzzle.expanded, 'generated': puzzle.generated,
+                         'peak_memory': peak, 'cost': cost, 'reference': reference,
+                         'optimal': cost == reference})
+    return rows
+
+
+# Sums the rows of a suite per solver and board size. The peak memory is the largest of the runs.
+def summarizeResults(rows):
+    summary = {}
+    for row in rows:
+        key = (row['solver'], row['tiles'])
+        if key not in summary:
+            summary[key] = {'solver': row['solver'], 'tiles': row['tiles'], 'runs': 0, 'time': 0.0,
+                            'expanded': 0, 'generated': 0, 'peak_memory': None, 'optimal': 0}
+        entry = summary[key]
+        entry['runs'] += 1
+        entry['time'] += row['time']
+        entry['expanded'] += row['expanded']
+        entry['generated'] += row['generated']
+        entry['optimal'] += row['optimal']
+        if row['peak_memory'] is not None:
+            entry['peak_memory'] = max(entry['peak_memory'] or 0, row['peak_memory'])
+    return list(summary.values())
+
+
+# Saves the rows of a suite, their summary and the settings used to a JSON file
+def saveResults(rows, path, **settings):
+    results = {'python': platform.python_version(), 'settings': settings,
+               'summary': summarizeResults(rows), 'rows': rows}
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=1)
+
+
+# Loads the results saved by saveResults()
+def loadResults(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# Compares two saved results per solver and board size and returns the regressions as
+# (solver, tiles, metric, baseline value, current value). A metric regresses when it grows
+# by more than its tolerance (see TOLERANCES), the time also by more than 'time_floor' seconds,
+# and 'optimal' when fewer optimal costs are found.
+def compareResults(baseline, current, tolerances=None, time_floor=TIME_FLOOR):
+    tolerances = dict(TOLERANCES, **(tolerances or {}))
+    before = {(entry['solver'], entry['tiles']): entry for entry in baseline['summary']}
+    regressions = []
+    for entry in current['summary']:
+        old = before.get((entry['solver'], entry['tiles']))
+        if old is None or old['runs'] != entry['runs']:
+            continue
+        for metric, tolerance in tolerances.items():
+            if old[metric] is None or entry[metric] is None:
+                continue
+            if metric == 'time' and entry[metric] - old[metric] < time_floor:
+                continue
+            if entry[metric] > old[metric] * (1 + tolerance):
+                regressions.append((entry['solver'], entry['tiles'], metric, old[metric], entry[metric]))
+        if entry['optimal'] < old['optimal']:
+            regressions.append((entry['solver'], entry['tiles'], 'optimal', old['optimal'], entry['optimal']))
+    return regressions
+
+
+# Prints the summary of a suite
+def printSummary(summary):
+    print('Solver        | Tiles | Runs | Optimal | Expanded | Generated | Time (s) | Peak memory (KB)')
+    for entry in summary:
+        memory = '{:16.0f}'.format(entry['peak_memory'] / 1024) if entry['peak_memory'] is not None else '{:>16}'.format('-')
+        print('{:13} | {:5} | {:4} | {:7} | {:8} | {:9} | {:8.3f} | {}'.format(
+            entry['solver'], entry['tiles'], entry['runs'], entry['optimal'], entry['expanded'],
+            entry['generated'], entry['time'], memory))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmarks of the puzzle solvers')
+    parser.add_argument('--suite', metavar='RESULTS', help='run the regression suite and save its results as JSON')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'RESULTS'), help='report the regressions of RESULTS against BASELINE')
+    parser.add_argument('--solvers', nargs='+', choices=list(SOLVERS), default=list(SOLVERS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[3, 4, 5])
+    parser.add_argument('--large-sizes', nargs='*', type=int, default=list(LARGE_SIZES), help='sizes of which only the reversed board is run')
+    parser.add_argument('--samples', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=5, help='solves of every tray, the fastest being timed')
+    parser.add_argument('--time-floor', type=float, default=TIME_FLOOR, help='smallest increase of time in seconds reported as a regression')
+    parser.add_argument('--no-memory', action='store_true', help='do not measure the peak memory')
+    args = parser.parse_args()
+
+    if args.suite:
+        rows = runSuite(args.solvers, args.sizes, args.samples, args.seed, memory=not args.no_memory, repeats=args.repeats,
+                        large_sizes=args.large_sizes)
+        saveResults(rows, args.suite, solvers=args.solvers, sizes=args.sizes, large_sizes=args.large_sizes,
+                    samples=args.samples, seed=args.seed, repeats=args.repeats)
+        printSummary(summarizeResults(rows))
+        sys.exit(0)
+
+    if args.compare:
+        regressions = compareResults(loadResults(args.compare[0]), loadResults(args.compare[1]), time_floor=args.time_floor)
+        for solver, tiles, metric, old, new in regressions:
+            print('REGRESSION {} tiles={} {}: {} -> {}'.format(solver, tiles, metric, old, new))
+        print('{} regression(s)'.format(len(regressions)))
+        sys.exit(1 if regressions else 0)
+
+    print('Tiles | Expanded | Time (s) | Expansions/s')
+    for tiles, expanded, elapsed, rate in benchmarkAStar():
+        print('{:5} | {:8} | {:8.3f} | {:12.0f}'.format(tiles, expanded, elapsed, rate))
+
+    print('\nHeuristic        | Tiles | Expanded | Time (s)')
+    for name, tiles, expanded, elapsed in compareHeuristics():
+        print('{:16} | {:5} | {:8} | {:8.3f}'.format(name, tiles, expanded, elapsed))
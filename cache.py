@@ -0,0 +1,133 @@
+import shelve
+from collections import OrderedDict
+
+from puzzle import Puzzle
+
+"""
+SolutionCache remembers the solutions of the trays already solved. Reversing a tray and
+swapping its black and white tiles (its mirror image) turns goal states into goal states and
+moves into moves of the same cost, so a tray and its mirror image have the same cost and
+mirrored solution paths. For the algorithms finding a minimum cost path (EXACT_ALGORITHMS)
+both are stored under a single entry keyed by the canonical form of the tray, the smaller of
+the tray and its mirror image. The other algorithms may find paths of different costs for a
+tray and its mirror image, so their trays are stored as given.
+The entries are kept in memory in least recently used order up to 'max_size' of them and,
+when a path is given, in an on-disk store which survives restarts. The number of hits and
+misses is kept in 'stats'.
+"""
+
+MIRROR = str.maketrans('BW', 'WB')
+
+# Algorithms always finding a minimum cost path, whose solutions can be shared with the mirror image
+EXACT_ALGORITHMS = ('astar', 'idastar', 'bidirectional')
+
+
+# Returns the mirror image of a tray: the tray reversed with the black and white tiles swapped
+def mirrorTray(tray):
+    return ''.join(tray)[::-1].translate(MIRROR)
+
+
+# Returns (canonical form of the tray, True if the tray is the mirror image of its canonical form)
+def canonicalTray(tray):
+    tray = ''.join(tray)
+    mirror = mirrorTray(tray)
+    if mirror < tray:
+        return mirror, True
+    return tray, False
+
+
+# Returns (tray under which the solutions of 'algorithm' are shared, True if it is the mirror
+# image of the tray): the canonical form for EXACT_ALGORITHMS, the tray itself otherwise
+def sharedTray(tray, algorithm):
+    if algorithm in EXACT_ALGORITHMS:
+        return canonicalTray(tray)
+    return ''.join(tray), False
+
+
+# Returns the name of a heuristic given by name or as a callable (None for the default one)
+def getHeuristicName(heuristic):
+    if heuristic is None or isinstance(heuristic, str):
+        return heuristic
+    return getattr(heuristic, '__name__', type(heuristic).__name__)
+
+
+# Returns the mirror image of every state of a path (None stays None)
+def mirrorPath(path):
+    return None if path is None else [mirrorTray(state) for state in path]
+
+
+class SolutionCache:
+
+    def __init__(self, max_size=10000, path=None):
+        self.max_size = max_size
+        self.entries = OrderedDict()                            #Key -> (path of the canonical tray, cost)
+        self.store = shelve.open(path) if path is not None else None
+        self.stats = {'hits': 0, 'mirror_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+
+    # Returns the key of the entry of a tray returned by sharedTray()
+    def getKey(self, canonical, algorithm, max_hop, heuristic=None):
+        return '{}|{}|{}|{}'.format(algorithm, max_hop, getHeuristicName(heuristic), canonical)
+
+
+    # Returns (path, cost) of a tray if it has been solved before, otherwise None
+    def get(self, tray, algorithm='astar', max_hop=2, heuristic=None):
+        canonical, mirrored = sharedTray(tray, algorithm)
+        key = self.getKey(canonical, algorithm, max_hop, heuristic)
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        elif self.store is not None and key in self.store:
+            entry = self.store[key]
+            self.remember(key, entry)
+            self.stats['disk_hits'] += 1
+        else:
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        if mirrored:
+            self.stats['mirror_hits'] += 1
+            return mirrorPath(entry[0]), entry[1]
+        return entry
+
+
+    # Saves the solution (path, cost) of a tray
+    def put(self, tray, path, cost, algorithm='astar', max_hop=2, heuristic=None):
+        canonical, mirrored = sharedTray(tray, algorithm)
+        key = self.getKey(canonical, algorithm, max_hop, heuristic)
+        entry = (mirrorPath(path) if mirrored else path, cost)
+        self.remember(key, entry)
+        if self.store is not None:
+            self.store[key] = entry
+
+
+    # Adds an entry to the memory and evicts the least recently used ones above max_size
+    def remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+    # Returns (path, cost) of a tray, solving it only if it is not in the cache
+    def solve(self, tray, algorithm='astar', max_hop=2, heuristic=None):
+        solution = self.get(tray, algorithm, max_hop, heuristic)
+        if solution is None:
+            solution = Puzzle(''.join(tray), max_hop, heuristic).solve(algorithm)
+            self.put(tray, solution[0], solution[1], algorithm, max_hop, heuristic)
+        return solution
+
+
+    # Returns the fraction of the lookups answered from the cache
+    def getHitRate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+
+    # Writes the on-disk store and closes it
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
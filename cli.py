@@ -0,0 +1,249 @@
+import argparse
+import io
+import os
+import sys
+import time
+
+from puzzle import ALGORITHMS, IDASTAR_TABLE_SIZE, Puzzle, checkTray
+
+"""
+Command line interface of the puzzle. Trays are read from the arguments, from files (-i, '-'
+for the standard input) or from the standard input when it is not a terminal, one tray per line,
+and are solved with the chosen algorithm and heuristic. One compact result is written per tray,
+as CSV (tray, cost, expanded, seconds, path with the states separated by '|'), JSON lines or a
+line of text, through a buffered writer, as are the goals listed by --all-goals. --tree prints
+the step by step displays of puzzle.py instead (BFS, A* and IDA* only).
+Only the modules needed by the options given are imported: the worker processes of batch.py
+with --workers, NumPy with --explore and the graph writers with --graph, so that a single
+solve starts quickly.
+
+    python3 cli.py 'BBW WWB'
+    python3 cli.py -i trays.txt -a bidirectional -f jsonl -o results.jsonl
+    cat trays.txt | python3 cli.py --heuristic pattern_database --workers 4
+"""
+
+FORMATS = ('csv', 'jsonl', 'text')
+RESULT_FIELDS = ('tray', 'cost', 'expanded', 'time', 'path')   #Fields of a solved tray
+GOAL_FIELDS = ('tray', 'goal', 'cost', 'path')                 #Fields of a goal listed by --all-goals
+TREE_ALGORITHMS = ('bfs', 'astar', 'idastar')                   #Algorithms whose search tree --tree can print
+BUFFER_SIZE = 1 << 16                                           #Characters buffered before writing the results
+
+
+# Yields the trays of the arguments, of the input files and of the standard input
+def iterTrays(trays, inputs):
+    yield from trays
+    for path in inputs:
+        f = sys.stdin if path == '-' else open(path)
+        try:
+            for line in f:
+                line = line.rstrip('\r\n')
+                if line:
+                    yield line
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+# Yields (tray, path, cost, expanded, seconds) for every tray, solved in this process. A tray
+# seen before is not solved again.
+def iterSolve(trays, algorithm, max_hop, heuristic, table_size=IDASTAR_TABLE_SIZE):
+    known = {}
+    for tray in trays:
+        checkTray(tray)
+        if tray not in known:
+            puzzle = Puzzle(tray, max_hop, heuristic)
+            start = time.perf_counter()
+            path, cost = puzzle.solve(algorithm, table_size=table_size)
+            known[tray] = (path, cost, puzzle.expanded, time.perf_counter() - start)
+        yield (tray,) + known[tray]
+
+
+# Returns the text line of a result
+def formatText(tray, path, cost, expanded):
+    if path is None:
+        return '{!r}: no goal can be reached\n'.format(tray)
+    return '{!r}: cost {} in {} moves, {} nodes expanded\n'.format(tray, cost, len(path) - 1, expanded)
+
+
+# Returns the text line of a goal listed by --all-goals
+def formatGoalText(tray, goal, cost, path):
+    return '{!r} -> {!r}: cost {}, path {}\n'.format(tray, goal, cost, ' | '.join(path))
+
+
+# Returns a value of a row as a CSV field: paths with the states separated by '|', times with
+# six decimals and None as an empty field
+def formatField(value):
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return '|'.join(value)
+    if isinstance(value, float):
+        return '%.6f' % value
+    return value
+
+
+# Writes rows holding the values of 'fields' in the given format, BUFFER_SIZE characters at a
+# time. 'formatLine' returns the text line of a row.
+def writeRows(rows, fields, fmt, out, formatLine):
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        import csv
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(fields)
+    elif fmt == 'jsonl':
+        import json
+
+    for row in rows:
+        if fmt == 'csv':
+            writer.writerow([formatField(value) for value in row])
+        elif fmt == 'jsonl':
+            buffer.write(json.dumps({field: round(value, 6) if isinstance(value, float) else value
+                                     for field, value in zip(fields, row)}) + '\n')
+        else:
+            buffer.write(formatLine(*row))
+        if buffer.tell() >= BUFFER_SIZE:
+            out.write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+    out.write(buffer.getvalue())
+    out.flush()
+
+
+# Writes the (tray, path, cost, nodes expanded, seconds) results of the solves in the given format
+def writeResults(results, fmt, out):
+    rows = ((tray, cost, expanded, seconds, path) for tray, path, cost, expanded, seconds in results)
+    writeRows(rows, RESULT_FIELDS, fmt, out, lambda tray, cost, expanded, seconds, path: formatText(tray, path, cost, expanded))
+
+
+# Writes the (tray, goal, cost, path) rows of --all-goals in the given format
+def writeGoals(goals, fmt, out):
+    writeRows(goals, GOAL_FIELDS, fmt, out, formatGoalText)
+
+
+# Yields (tray, goal, cost, path) for every goal state of every tray, in increasing order of cost
+def iterGoals(trays, max_hop):
+    for tray in trays:
+        checkTray(tray)
+        for goal, cost, path in Puzzle(tray, max_hop).iterAllGoals():
+            yield tray, goal, cost, path
+
+
+# Prints the search and the solution of a tray with the displays of puzzle.py
+def showSolution(tray, algorithm, max_hop, heuristic, print_tree, table_size=IDASTAR_TABLE_SIZE):
+    puzzle = Puzzle(tray, max_hop, heuristic)
+    if algorithm == 'bfs':
+        puzzle.solveBFS(print_tree)
+        puzzle.getSolutionBfs()
+    elif algorithm == 'astar':
+        puzzle.solveAStar(print_tree)
+        puzzle.getSolutionAStar()
+    elif algorithm == 'idastar':
+        puzzle.solveIDAStar(print_tree, table_size)
+        puzzle.getSolutionIDAStar()
+    elif algorithm == 'bidirectional':
+        puzzle.solveBidirectional()
+        puzzle.getSolutionBidirectional()
+    elif algorithm == 'weighted':
+        puzzle.solveWeightedAStar()
+        puzzle.getSolutionAnytime()
+    else:
+        puzzle.solveARAStar()
+        puzzle.getSolutionAnytime()
+
+
+# Parses the value of --workers: a number of worker processes as in batch.iterSolveMany(), or
+# 'auto' for one per CPU
+def workerCount(value):
+    if value == 'auto':
+        return os.cpu_count() or 1
+    try:
+        workers = int(value)
+    except ValueError:
+        workers = -1
+    if workers < 0:
+        raise argparse.ArgumentTypeError("expected a number of processes or 'auto', got " + repr(value))
+    return workers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve trays of the black and white tiles puzzle')
+    parser.add_argument('trays', nargs='*', help="trays to solve, e.g. 'BBW WWB'")
+    parser.add_argument('-i', '--input', action='append', default=[], metavar='FILE', help="file of trays, one per line ('-' for the standard input)")
+    parser.add_argument('-a', '--algorithm', choices=ALGORITHMS, default='astar')
+    parser.add_argument('--heuristic', default=None, help="heuristic of the informed searches (see heuristics.HEURISTICS), 'wrong_side' by default")
+    parser.add_argument('--max-hop', type=int, default=2, help='largest number of tiles a tile can hop over')
+    parser.add_argument('--table-size', type=int, default=IDASTAR_TABLE_SIZE, help='slots of the transposition table of IDA* (0 to keep only the current path)')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='csv')
+    parser.add_argument('-o', '--output', metavar='FILE', help='file to write the results to, the standard output by default')
+    parser.add_argument('--workers', type=workerCount, default=None, metavar='N',
+                        help="solve with batch.py in N worker processes ('auto' for one per CPU, 0 to solve in this process)")
+    parser.add_argument('--all-goals', action='store_true', help='list the minimum cost path to every goal state of each tray')
+    parser.add_argument('--tree', action='store_true', help='print the search tree and the solution of every tray with the displays of puzzle.py')
+    parser.add_argument('--graph', metavar='FILE', help='export the state space graph of the first tray (.dot, .graphml or .csv)')
+    parser.add_argument('--explore', action='store_true', help='count the states of every BFS layer (number of moves) of the first tray with NumPy')
+    args = parser.parse_args(argv)
+
+    if not args.trays and not args.input and not sys.stdin.isatty():
+        args.input.append('-')
+    if not args.trays and not args.input:
+        parser.error('no trays given')
+    if args.tree and not args.all_goals and args.algorithm not in TREE_ALGORITHMS:
+        parser.error('--tree is only available with ' + ', '.join(TREE_ALGORITHMS))
+    if args.heuristic is not None:
+        from heuristics import HEURISTICS
+        if args.heuristic not in HEURISTICS:
+            parser.error('unknown heuristic: ' + args.heuristic)
+
+    trays = iterTrays(args.trays, args.input)
+    try:
+        if args.graph or args.explore:
+            tray = next(trays, None)
+            if tray is None:
+                parser.error('no trays given')
+            checkTray(tray)
+            if args.explore:
+                try:
+                    from vector_bfs import VectorBFS
+                except ImportError:
+                    parser.error('NumPy is required for --explore')
+            puzzle = Puzzle(tray, args.max_hop, args.heuristic)
+            if args.graph:
+                from graph_export import exportGraph
+                exportGraph(puzzle, args.graph)
+            if args.explore:
+                layers = VectorBFS(puzzle).run(record_depth=False)
+                print('Layer | States')
+                for depth, count in enumerate(layers):
+                    print('{:5} | {}'.format(depth, count))
+            return 0
+
+        if args.tree and not args.all_goals:
+            for tray in trays:
+                checkTray(tray)
+                showSolution(tray, args.algorithm, args.max_hop, args.heuristic, True, args.table_size)
+            return 0
+
+        if args.all_goals:
+            results = iterGoals(trays, args.max_hop)
+        elif args.workers is not None:
+            from batch import iterSolveMany
+            results = iterSolveMany(trays, args.algorithm, args.workers, args.max_hop, args.heuristic, table_size=args.table_size)
+        else:
+            results = iterSolve(trays, args.algorithm, args.max_hop, args.heuristic, args.table_size)
+
+        out = open(args.output, 'w', buffering=BUFFER_SIZE) if args.output else sys.stdout
+        try:
+            (writeGoals if args.all_goals else writeResults)(results, args.format, out)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    except ValueError as error:
+        print('error: ' + str(error), file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
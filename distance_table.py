@@ -0,0 +1,133 @@
+import mmap
+import struct
+from array import array
+
+from puzzle import Puzzle
+
+"""
+DistanceTable stores, for every tray of a board (a number of black and white tiles and a
+maximum hop length), the minimum cost to reach a goal state and the best move to make.
+Both are kept in compact arrays indexed by the rank of the state (see Puzzle.rankState()):
+the cost as an unsigned 32 bit integer and the best move as the signed offset of the tile
+that moves into the empty space (0 for the goal states).
+The table is built once with a backward multi-source uniform-cost search from all the goal
+states. As every move can be undone at the same cost, this is a search over the same move
+tables as the forward searches. Once built, any tray of the board is solved by following
+the best moves, in time proportional to the length of the path.
+Tables can be saved to disk and loaded back with memory mapping, so that loading a table
+does not read the whole file.
+"""
+
+UNREACHABLE = 0xFFFFFFFF                                        #Cost of the states that cannot reach a goal
+MAGIC = 0x54504454                                              #Identifies a distance table file
+HEADER = struct.Struct('=5I')                                   #Magic, blacks, whites, max_hop, number of states
+
+
+class DistanceTable:
+
+    def __init__(self, puzzle, costs, moves, source=None):
+        self.puzzle = puzzle                                    #Puzzle of the board, used for its move tables
+        self.costs = costs                                      #Cost to reach a goal, indexed by rank
+        self.moves = moves                                      #Offset of the best move, indexed by rank
+        self.source = source                                    #Memory map of the file the table was loaded from
+
+
+    # Builds the table for the board of 'puzzle'. The search processes the states in buckets
+    # of equal cost (the move costs are small integers), starting from all the goal states, and
+    # writes the costs and the best moves straight into the arrays indexed by rank.
+    @classmethod
+    def build(cls, puzzle):
+        board = Puzzle(puzzle.getGoalState(0), puzzle.max_hop)
+        moves_table = board.astar_moves
+        blank_mask = board.blank_mask
+        rank_state = board.rankState
+
+        count = board.getStateCount()
+        costs = array('I', [UNREACHABLE]) * count
+        moves = array('b', [0]) * count
+        buckets = [[(goal, rank_state(goal)) for goal in board.goal_codes]]
+        for goal, rank in buckets[0]:
+            costs[rank] = 0
+
+        cost = 0
+        while cost < len(buckets):
+            for state, rank in buckets[cost]:
+                if costs[rank] != cost:
+                    continue
+                for shift, masks, delta, move_cost in moves_table[state & blank_mask]:
+                    child = (state ^ masks[(state >> shift) & 3]) + delta
+                    child_rank = rank_state(child)
+                    child_cost = cost + move_cost
+                    if child_cost < costs[child_rank]:
+                        costs[child_rank] = child_cost
+                        moves[child_rank] = -delta
+                        while len(buckets) <= child_cost:
+                            buckets.append([])
+                        buckets[child_cost].append((child, child_rank))
+            buckets[cost] = None
+            cost += 1
+        return cls(board, costs, moves)
+
+
+    # Saves the table to a file. The arrays are stored in the native byte order.
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.puzzle.blacks, self.puzzle.whites, self.puzzle.max_hop, len(self.costs)))
+            f.write(self.costs.tobytes())
+            f.write(self.moves.tobytes())
+
+
+    # Loads a table saved with save() by memory mapping the file
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, blacks, whites, max_hop, count = HEADER.unpack_from(source)
+        if magic != MAGIC:
+            raise ValueError('Not a distance table file: ' + str(path))
+
+        view = memoryview(source)
+        start = HEADER.size
+        costs = view[start:start + 4 * count].cast('I')
+        moves = view[start + 4 * count:start + 5 * count].cast('b')
+        board = Puzzle('W' * whites + 'B' * blacks + ' ', max_hop)
+        return cls(board, costs, moves, source)
+
+
+    # Releases the memory map of a table loaded from a file
+    def close(self):
+        if self.source is not None:
+            self.costs.release()
+            self.moves.release()
+            self.source.close()
+            self.source = None
+
+
+    # Checks that 'puzzle' has the same board as the table
+    def matches(self, puzzle):
+        return (puzzle.blacks, puzzle.whites, puzzle.max_hop) == (self.puzzle.blacks, self.puzzle.whites, self.puzzle.max_hop)
+
+
+    # Returns the minimum cost to reach a goal from 'tray', or None if no goal can be reached
+    def getCost(self, tray):
+        cost = self.costs[self.puzzle.rankState(self.puzzle.encodeTray(tray))]
+        return None if cost == UNREACHABLE else cost
+
+
+    # Returns (path, cost) of a minimum cost solution from 'tray', with the states of the path
+    # given as strings, or (None, None) if no goal can be reached.
+    def getPath(self, tray):
+        board = self.puzzle
+        state = board.encodeTray(tray)
+        rank = board.rankState(state)
+        cost = self.costs[rank]
+        if cost == UNREACHABLE:
+            return None, None
+
+        path = [board.convertToString(state)]
+        while self.moves[rank] != 0:
+            state = board.moveTile(state & board.blank_mask, self.moves[rank], state)
+            rank = board.rankState(state)
+            path.append(board.convertToString(state))
+        return path, cost
@@ -0,0 +1,212 @@
+import csv
+from array import array
+from xml.sax.saxutils import escape
+
+"""
+Export of the state space graph of a puzzle (the graph of Q1.4) to Graphviz DOT, GraphML or a CSV
+edge list. walkGraph() walks the states reachable from the initial state of a Puzzle in order of
+their least cost from it (a uniform-cost search processing buckets of equal cost) and yields the
+nodes and edges as it goes; the writers consume these events and write them to the file at once,
+so only the cost of every state (two bytes, indexed by rank) and the frontier are kept in memory,
+however many edges the graph has.
+Every undirected edge is yielded once, when the second of its states is reached, so both of its
+states have always been yielded before it. The states and moves of a least-cost path from the
+initial state to a goal are marked so that the writers can highlight them.
+For huge graphs the walk can stop at a maximum cost, keep a random sample of the states (the same
+states for the same seed), or collapse every cost layer into a single node counting its states,
+with edges counting the moves between layers.
+"""
+
+NODE = 'node'
+EDGE = 'edge'
+UNSEEN = 0xFFFF                                                 #Cost of the states not reached yet
+FORMATS = {'.dot': 'dot', '.gv': 'dot', '.graphml': 'graphml', '.csv': 'csv'}
+
+
+# Returns (states, edges) of a least-cost path from the initial state to a goal as sets of ranks
+# and of sorted pairs of ranks, both empty if no goal can be reached
+def getPathRanks(puzzle):
+    path = puzzle.solve('astar')[0] or []
+    ranks = [puzzle.rankState(puzzle.encodeTray(tray)) for tray in path]
+    return set(ranks), {tuple(sorted(pair)) for pair in zip(ranks, ranks[1:])}
+
+
+# Returns True if a state of the given rank is kept in a sample of the states of size 'sample'
+# (a fraction of them). The choice only depends on the rank and the seed.
+def isSampled(rank, sample, seed):
+    return sample >= 1.0 or ((rank + seed) * 0x9E3779B1 & 0xFFFFFFFF) < sample * 0x100000000
+
+
+# Walks the states reachable from the initial state of 'puzzle' in order of their least cost from
+# it and yields (state, rank, cost, earlier) for each of them, 'earlier' listing the neighbours
+# reached before it as (state, rank, cost, move cost). States costing more than 'max_cost' are
+# left out.
+def walkGraph(puzzle, max_cost=None):
+    moves = puzzle.astar_moves
+    blank_mask = puzzle.blank_mask
+    costs = array('H', [UNSEEN]) * puzzle.getStateCount()
+
+    buckets = [[puzzle.start]]
+    cost = 0
+    while cost < len(buckets):
+        for state in buckets[cost]:
+            rank = puzzle.rankState(state)
+            if costs[rank] != UNSEEN:
+                continue
+            costs[rank] = cost
+
+            earlier = []
+            for shift, masks, delta, move_cost in moves[state & blank_mask]:
+                child = (state ^ masks[(state >> shift) & 3]) + delta
+                child_rank = puzzle.rankState(child)
+                if costs[child_rank] != UNSEEN:
+                    earlier.append((child, child_rank, costs[child_rank], move_cost))
+                elif max_cost is None or cost + move_cost <= max_cost:
+                    while len(buckets) <= cost + move_cost:
+                        buckets.append([])
+                    buckets[cost + move_cost].append(child)
+            yield state, rank, cost, earlier
+        buckets[cost] = None
+        cost += 1
+
+
+# Yields the state space graph reachable from the initial state of 'puzzle' as events:
+#   (NODE, rank, tray, cost, is goal, on path)
+#   (EDGE, rank, rank, tray, tray, move cost, on path)
+# where 'cost' is the least cost of the state from the initial state. States costing more than
+# 'max_cost' are left out, and only a fraction 'sample' of the states (and the edges between them)
+# is yielded, the states of the least-cost path being always kept. 'highlight' marks the least-cost
+# path, which is found with A* before the walk.
+def iterGraph(puzzle, max_cost=None, sample=1.0, seed=0, highlight=True):
+    path_states, path_edges = getPathRanks(puzzle) if highlight else (set(), set())
+    blank_mask = puzzle.blank_mask
+    goal_codes = puzzle.goal_codes
+
+    for state, rank, cost, earlier in walkGraph(puzzle, max_cost):
+        if rank not in path_states and not isSampled(rank, sample, seed):
+            continue
+        tray = puzzle.convertToString(state)
+        yield NODE, rank, tray, cost, state == goal_codes[state & blank_mask], rank in path_states
+        for source, source_rank, source_cost, move_cost in earlier:
+            if source_rank in path_states or isSampled(source_rank, sample, seed):
+                on_path = tuple(sorted((source_rank, rank))) in path_edges
+                yield EDGE, source_rank, rank, puzzle.convertToString(source), tray, move_cost, on_path
+
+
+# Yields the graph of iterGraph() with every cost layer collapsed into a single node, as the events
+#   (NODE, cost, label, cost, number of goals in the layer, on path)
+#   (EDGE, cost, cost, label, label, number of moves between the layers, on path)
+# the edges from earlier layers (and within the layer) being yielded right after the node of a layer.
+def iterLayerGraph(puzzle, max_cost=None, highlight=True):
+    path_states, path_edges = getPathRanks(puzzle) if highlight else (set(), set())
+    blank_mask = puzzle.blank_mask
+    goal_codes = puzzle.goal_codes
+    labels = {}                                                 #Cost -> label of the finished layers
+
+    # Returns the events of a finished layer, 'edges' mapping (source cost, on path) to the
+    # number of moves
+    def finishLayer(layer, count, goals, on_path, edges):
+        labels[layer] = 'cost {}: {} states'.format(layer, count)
+        events = [(NODE, layer, labels[layer], layer, goals, on_path)]
+        for (source, path_edge), moves in sorted(edges.items()):
+            events.append((EDGE, source, layer, labels[source], labels[layer], moves, path_edge))
+        return events
+
+    layer = None
+    count = goals = 0
+    on_path = False
+    edges = {}
+    for state, rank, cost, earlier in walkGraph(puzzle, max_cost):
+        if cost != layer:
+            if layer is not None:
+                yield from finishLayer(layer, count, goals, on_path, edges)
+            layer = cost
+            count = goals = 0
+            on_path = False
+            edges = {}
+        count += 1
+        goals += state == goal_codes[state & blank_mask]
+        on_path = on_path or rank in path_states
+        for source, source_rank, source_cost, move_cost in earlier:
+            key = (source_cost, tuple(sorted((source_rank, rank))) in path_edges)
+            edges[key] = edges.get(key, 0) + 1
+    if layer is not None:
+        yield from finishLayer(layer, count, goals, on_path, edges)
+
+
+# Writes graph events to a Graphviz DOT file. Goal states are drawn with a double border and the
+# least-cost path in red.
+def writeDot(events, path):
+    with open(path, 'w') as f:
+        f.write('graph states {\n    node [shape=box, fontname="Courier"];\n')
+        for event in events:
+            if event[0] == NODE:
+                kind, node, label, cost, goal, on_path = event
+                style = ', peripheries=2' if goal else ''
+                style += ', color=red, penwidth=2' if on_path else ''
+                f.write('    {} [label="{}\\ng={}"{}];\n'.format(node, label, cost, style))
+            else:
+                kind, source, target, source_label, target_label, cost, on_path = event
+                style = ', color=red, penwidth=2' if on_path else ''
+                f.write('    {} -- {} [label="{}"{}];\n'.format(source, target, cost, style))
+        f.write('}\n')
+
+
+# Writes graph events to a GraphML file, with the label, cost, goal and path flags of the nodes
+# and the cost and path flag of the edges as attributes
+def writeGraphML(events, path):
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+                '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+                '  <key id="cost" for="node" attr.name="cost" attr.type="int"/>\n'
+                '  <key id="goal" for="node" attr.name="goal" attr.type="int"/>\n'
+                '  <key id="path" for="node" attr.name="on_path" attr.type="boolean"/>\n'
+                '  <key id="weight" for="edge" attr.name="cost" attr.type="int"/>\n'
+                '  <key id="edge_path" for="edge" attr.name="on_path" attr.type="boolean"/>\n'
+                '  <graph id="states" edgedefault="undirected">\n')
+        for event in events:
+            if event[0] == NODE:
+                kind, node, label, cost, goal, on_path = event
+                f.write('    <node id="n{}"><data key="label">{}</data><data key="cost">{}</data>'
+                        '<data key="goal">{}</data><data key="path">{}</data></node>\n'
+                        .format(node, escape(label), cost, int(goal), 'true' if on_path else 'false'))
+            else:
+                kind, source, target, source_label, target_label, cost, on_path = event
+                f.write('    <edge source="n{}" target="n{}"><data key="weight">{}</data>'
+                        '<data key="edge_path">{}</data></edge>\n'
+                        .format(source, target, cost, 'true' if on_path else 'false'))
+        f.write('  </graph>\n</graphml>\n')
+
+
+# Writes the edges of graph events to a CSV file, one row (source, target, cost, on_path) per
+# edge with the states given as trays
+def writeCsv(events, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'target', 'cost', 'on_path'])
+        for event in events:
+            if event[0] == EDGE:
+                writer.writerow([event[3], event[4], event[5], int(event[6])])
+
+
+WRITERS = {'dot': writeDot, 'graphml': writeGraphML, 'csv': writeCsv}
+
+
+# Exports the state space graph of 'puzzle' to a file, in the format given by 'fmt' or by the
+# extension of the path (see FORMATS). 'collapse' exports one node per cost layer (see
+# iterLayerGraph()), otherwise 'max_cost', 'sample' and 'seed' are passed to iterGraph().
+def exportGraph(puzzle, path, fmt=None, max_cost=None, sample=1.0, seed=0, collapse=False, highlight=True):
+    if fmt is None:
+        extension = path[path.rfind('.'):].lower() if '.' in path else ''
+        if extension not in FORMATS:
+            raise ValueError('Unknown graph format for ' + path)
+        fmt = FORMATS[extension]
+    if fmt not in WRITERS:
+        raise ValueError('Unknown graph format: ' + str(fmt))
+
+    if collapse:
+        events = iterLayerGraph(puzzle, max_cost, highlight)
+    else:
+        events = iterGraph(puzzle, max_cost, sample, seed, highlight)
+    WRITERS[fmt](events, path)
@@ -0,0 +1,111 @@
+import heapq
+
+"""
+Heuristics for the A* search of the puzzle. A heuristic is any callable that takes a packed
+state of a Puzzle and returns a lower bound of the cost to reach a goal from it. Puzzle uses
+its wrongSideHeuristic() by default; the heuristics below can be plugged in instead.
+
+PatternDatabaseHeuristic is an additive pattern database over disjoint windows of cells: the
+cells of the tray are split into two or more consecutive windows of at most 'window' cells (a
+single window would be the whole state space), and the pattern of a window keeps the position of
+the empty space along with the tiles inside the window, the tiles outside being unknown. A move of the puzzle moves a tile from a source cell into the empty
+space, and half of its cost is charged to the window of each of these two cells. Every window
+sees the moves of the puzzle as moves of its own pattern (a tile coming from outside may be of
+either colour), so the cost charged to a window is at least the distance of its pattern to a
+goal, and the sum of the distances of all the windows never overestimates the real cost.
+The distances of a pattern are computed once with a backward uniform-cost search from the goal
+states of the pattern and cached for every board with the same tiles and hop length. The costs
+are stored doubled to stay integers. The estimate is combined with wrongSideHeuristic() by
+taking the larger of both, which keeps it admissible and never less informed than the default.
+"""
+
+_pattern_cache = {}                                             #(n, blacks, max_hop, first, last) -> (mask, distances)
+
+
+# Returns the doubled minimum cost charged to the window of cells 'first' to 'last' to reach a
+# goal, for every pattern of the window. A pattern is the packed state of the puzzle masked to
+# the index of the empty space and to the bits of the cells of the window, so that it can be
+# looked up with a single 'and'.
+def buildPattern(puzzle, first, last):
+    n = puzzle.n
+    key = (n, puzzle.blacks, puzzle.max_hop, first, last)
+    if key in _pattern_cache:
+        return _pattern_cache[key]
+
+    shifts = puzzle.cell_shifts
+    blank_mask = puzzle.blank_mask
+    mask = blank_mask | sum(3 << shifts[cell] for cell in range(first, last + 1))
+    limits = (0, puzzle.blacks, puzzle.whites)                  #Number of tiles of every code
+    reach = puzzle.max_hop + 1
+
+    distance = {}
+    frontier = []
+    for goal in puzzle.goal_codes:
+        if goal & mask not in distance:
+            distance[goal & mask] = 0
+            frontier.append((0, goal & mask))
+
+    while frontier:
+        cost, pattern = heapq.heappop(frontier)
+        if distance[pattern] != cost:
+            continue
+        empty = pattern & blank_mask
+        inside = first <= empty <= last
+        counts = [0, 0, 0]
+        for cell in range(first, last + 1):
+            counts[(pattern >> shifts[cell]) & 3] += 1
+
+        # The last move brought a tile from the empty space into the cell 'source', which was empty
+        for source in range(max(0, empty - reach), min(n, empty + reach + 1)):
+            if source == empty:
+                continue
+            charged = max(1, abs(source - empty) - 1) * (inside + (first <= source <= last))
+            parent = (pattern & ~blank_mask) | source
+            if first <= source <= last:
+                code = (pattern >> shifts[source]) & 3
+                parent &= ~(3 << shifts[source])
+                parents = [parent | (code << shifts[empty])] if inside else [parent]
+            elif inside:
+                parents = [parent | (code << shifts[empty]) for code in (1, 2) if counts[code] < limits[code]]
+            else:
+                parents = [parent]
+
+            for parent in parents:
+                parent_cost = cost + charged
+                if parent_cost < distance.get(parent, parent_cost + 1):
+                    distance[parent] = parent_cost
+                    heapq.heappush(frontier, (parent_cost, parent))
+
+    _pattern_cache[key] = (mask, distance)
+    return mask, distance
+
+
+class PatternDatabaseHeuristic:
+
+    def __init__(self, puzzle, window=12):
+        self.puzzle = puzzle
+        count = max(2, -(-puzzle.n // window))                  #Number of windows
+        bounds = [puzzle.n * i // count for i in range(count + 1)]
+        self.patterns = [buildPattern(puzzle, bounds[i], bounds[i + 1] - 1) for i in range(count)]
+
+
+    # Returns the sum of the distances of the patterns of all the windows, or the estimate of
+    # wrongSideHeuristic() if it is larger
+    def __call__(self, state):
+        if not isinstance(state, int):
+            state = self.puzzle.encodeTray(state)
+        estimate = 0
+        try:
+            for mask, distance in self.patterns:
+                estimate += distance[state & mask]
+        except KeyError:
+            # No goal can be reached from the pattern (e.g. without hops), nor from the state
+            return self.puzzle.wrongSideHeuristic(state)
+        return max((estimate + 1) // 2, self.puzzle.wrongSideHeuristic(state))
+
+
+# Heuristics that can be selected by name, each given as a function of the puzzle
+HEURISTICS = {
+    'wrong_side': lambda puzzle: puzzle.wrongSideHeuristic,
+    'pattern_database': PatternDatabaseHeuristic,
+}
@@ -1,4 +1,101 @@
-from queue import PriorityQueue
+import heapq
+import math
+import time
+
+from heuristics import HEURISTICS
+from tracing import EXPANDED, GENERATED, GOAL, REPARENT
+
+# Codes used for the cells of a packed state. The codes follow the ordering of the
+# characters (' ' < 'B' < 'W') so that packed states compare like the trays they encode.
+CELL_CODES = {' ': 0, 'B': 1, 'W': 2}
+CELL_CHARS = ' BW'
+
+# Algorithms that can be selected by name in Puzzle.solve()
+ALGORITHMS = ('bfs', 'astar', 'idastar', 'bidirectional', 'weighted', 'arastar')
+
+# Default number of slots of the transposition table of IDA* (see Puzzle.solveIDAStar())
+IDASTAR_TABLE_SIZE = 1 << 18
+
+# Odd multiplier spreading packed states over the slots of the transposition table of IDA*
+# (the low bits of a packed state only hold the index of the empty space). The slot is taken
+# from the high bits of the 64-bit product, which depend on every cell of the state.
+IDASTAR_HASH = 0x9E3779B97F4A7C15
+HASH_MASK = (1 << 64) - 1
+
+
+# Raises a ValueError unless the tray holds only B and W tiles and exactly one empty space
+def checkTray(tray):
+    if tray.count(' ') != 1 or len(tray) != tray.count(' ') + tray.count('B') + tray.count('W'):
+        raise ValueError('A tray must contain B and W tiles and exactly one empty space: ' + repr(''.join(tray)))
+
+
+# Returns the offsets of the tile that moves into the empty space, in the order the children
+# are generated by A*, for hops over at most 'max_hop' tiles. A positive offset is a move to the
+# 'left' and a negative one to the 'right'.
+def getAStarMoveOrder(max_hop):
+    order = []
+    for offset in range(1, max_hop + 2):
+        order += [offset, -offset]
+    return order
+
+
+# Returns the offsets in the order the children are generated by BFS (hops over one tile first)
+def getBfsMoveOrder(max_hop):
+    order = getAStarMoveOrder(max_hop)
+    return order[2:4] + order[:2] + order[4:]
+
+"""
+NodeStore keeps the nodes generated by a search. Every node is identified by its node number
+and its data (packed state, parent node number, cost from the root, cost of the last move and
+the heuristic estimate of informed searches) is kept in lists indexed by that number, along
+with a dictionary from the packed state to the node number. This makes looking up the parent
+of a node and rebuilding a path O(1) per step.
+"""
+class NodeStore:
+
+    def __init__(self):
+        self.states = []                                        #Packed state of every node
+        self.parents = []                                       #Node number of the parent (-1 for the root)
+        self.g = []                                             #Cost to reach the node from the root
+        self.actions = []                                       #Cost of the move from the parent (0 for the root)
+        self.h = []                                             #Heuristic estimate of the cost to a goal
+        self.index = {}                                         #Packed state -> node number
+
+
+    def __len__(self):
+        return len(self.states)
+
+
+    def __contains__(self, state):
+        return state in self.index
+
+
+    # Adds a node and returns its node number
+    def add(self, state, parent, g, action, h=0):
+        node = len(self.states)
+        self.states.append(state)
+        self.parents.append(parent)
+        self.g.append(g)
+        self.actions.append(action)
+        self.h.append(h)
+        self.index[state] = node
+        return node
+
+
+    # Returns the node number of a packed state
+    def getNode(self, state):
+        return self.index[state]
+
+
+    # Returns the node numbers on the path from the root to 'node'
+    def getPath(self, node):
+        path = []
+        while node != -1:
+            path.append(node)
+            node = self.parents[node]
+        path.reverse()
+        return path
+
 
 """
 Puzzle is a class that encompasses the whole black and white tile puzzle problem
@@ -6,182 +103,313 @@ which includes an uninformed(BFS) and an informed(A*) search algorithm defined t
 problem.
 Every state of the puzzle eg. "BWBW BW" is termed as "tray" inside the class and is defined as 
 a list for the ease of operations to be performed on it.
+The tray may hold any number of black and white tiles along with a single empty space, and a tile
+may hop over at most 'max_hop' tiles (2 in the original puzzle).
+The heuristic used by A* is wrongSideHeuristic() unless another one is given, either by name
+(see heuristics.HEURISTICS) or as a callable taking a packed state.
+Inside the search algorithms a tray is packed into a single integer: every cell takes 2 bits
+(cell 0 being the most significant) and the index of the empty space is kept in the lowest bits,
+so that the children of a state can be generated from precomputed move tables without
+building any lists.
 """
 class Puzzle:
 
-    def __init__(self, input_string):
+    def __init__(self, input_string, max_hop=2, heuristic=None):
         self.tray = list(input_string)
         self.n = len(input_string)                                #length of puzzle
-        self.bfs = {}                                           #Used in BFS to store the node's data
-        self.astar = {}                                         #Used in A* to store the node's data
-        self.priority_queue = PriorityQueue()                   #Used in A*
-        self.closed = {}                                        #Used to check the visited nodes in A*
+        checkTray(self.tray)
+        if max_hop < 0:
+            raise ValueError('max_hop must be non-negative')
+
+        self.max_hop = max_hop                                  #Maximum number of tiles a tile can hop over
+        self.blacks = self.tray.count('B')                      #Number of black tiles
+        self.whites = self.tray.count('W')                      #Number of white tiles
+        self.bfs = NodeStore()                                  #Used in BFS to store the node's data
+        self.astar = NodeStore()                                #Used in A* to store the node's data
+        self.frontier = []                                      #Priority queue (heap) used in A*
+        self.closed = set()                                     #Used to check the visited nodes in A*
         self.astar_goal = []                                    #Saves the goal state for A* algorithm
         self.bfs_goal = []                                      #Saves the goal state for BFS
         self.a_count = 0                                        #Number of nodes in A*
+        self.expanded = 0                                       #Number of nodes expanded by the last search
+        self.generated = 0                                      #Number of nodes generated by the last search
+        self.trace = None                                       #Trace sink of the running A* search
+        self.stats = None                                       #SearchStats of the running solve (see stats.py)
+        self.dijkstra = NodeStore()                             #Used when generating all the goal states
+        self.idastar_path = []                                  #Packed states on the current path of IDA*
+        self.idastar_actions = []                               #Cost of the move to every state on the path of IDA*
+        self.idastar_goal = []                                  #Saves the goal state for IDA*
+        self.idastar_table = []                                 #(state, g(n)) of a state seen in an iteration of IDA*, per slot
+        self.idastar_table_size = 0                             #Number of slots of idastar_table (0 for no table)
+        self.forward = NodeStore()                              #Used in the forward half of the bidirectional search
+        self.backward = NodeStore()                             #Used in the backward half of the bidirectional search
+        self.bidirectional_path = []                            #Packed states of the path of the bidirectional search
+        self.bidirectional_actions = []                         #Cost of the move to every state of that path
+        self.anytime = NodeStore()                              #Used in weighted A* and ARA*
+        self.anytime_path = []                                  #Packed states of the best path of weighted A* or ARA*
+        self.anytime_actions = []                               #Cost of the move to every state of that path
+        self.anytime_cost = None                                #Cost of that path
+        self.anytime_bound = None                               #Proven bound on (cost of that path) / (minimum cost)
+        self.anytime_solutions = []                             #(cost, bound, nodes expanded, seconds) of every improvement
         self.covered_goal_states = []                           #List of explored goal states when generating all goal states
-        self.goal_states = ["WWW BBB", "WWWB BB", "WWWBB B", "WWWBBB ", " WWWBBB", "W WWBBB", "WW WBBB"]
+        self._goal_states = None                                #Goal states as strings, generated on first use
+
+        self.blank_bits = max(1, (self.n - 1).bit_length())     #Bits used to store the index of the empty space
+        self.blank_mask = (1 << self.blank_bits) - 1
+        self.cell_shifts = [self.blank_bits + 2 * (self.n - 1 - i) for i in range(self.n)]
+        self.astar_moves = self.buildMoveTable(getAStarMoveOrder(max_hop))  #Moves for every position of the empty space
+        self.bfs_moves = self.buildMoveTable(getBfsMoveOrder(max_hop))
+        self.goal_codes = self.buildGoalCodes()                 #Packed goal state for every position of the empty space
+        self.start = self.encodeTray(self.tray)                 #Packed initial state
+        self.heuristic = self.wrongSideHeuristic                #Heuristic used by A*
+        if heuristic is not None:
+            self.setHeuristic(heuristic)
+
+
+    # Sets the heuristic used by A*, given by name or as a callable taking a packed state
+    def setHeuristic(self, heuristic):
+        if isinstance(heuristic, str):
+            if heuristic not in HEURISTICS:
+                raise ValueError('Unknown heuristic: ' + heuristic)
+            heuristic = HEURISTICS[heuristic](self)
+        self.heuristic = heuristic
+
+
+    # Returns the cost of moving a tile by 'offset' cells into the empty space.
+    # A shift costs 1 and a hop costs the number of tiles hopped over.
+    def getMoveCost(self, offset):
+        return max(1, abs(offset) - 1)
+
+
+    # Precomputes, for every position of the empty space, the moves that are legal from it.
+    # Each move is stored as (shift of the moving cell, xor masks indexed by the cell code,
+    # change of the empty index, cost) so that a child is (state ^ masks[code]) + delta.
+    def buildMoveTable(self, order):
+        table = []
+        for empty in range(self.n):
+            moves = []
+            for offset in order:
+                source = empty + offset
+                if 0 <= source < self.n:
+                    shift = self.cell_shifts[source]
+                    masks = tuple((code << shift) | (code << self.cell_shifts[empty]) for code in range(3))
+                    moves.append((shift, masks, offset, self.getMoveCost(offset)))
+            table.append(moves)
+        return table
+
+
+    # Returns the packed goal state for every position of the empty space, i.e. the tray with
+    # all the white tiles to the left of all the black tiles. As there is exactly one goal per
+    # position of the empty space, a packed state is a goal iff it equals goal_codes[empty index].
+    def buildGoalCodes(self):
+        return [self.encodeTray(self.getGoalState(i)) for i in range(self.n)]
+
+
+    # Returns the goal state with the empty space at index 'empty' as a string
+    def getGoalState(self, empty):
+        tiles = 'W' * self.whites + 'B' * self.blacks
+        return tiles[:empty] + ' ' + tiles[empty:]
+
+
+    # All the goal states as strings, generated the first time they are needed
+    @property
+    def goal_states(self):
+        if self._goal_states is None:
+            self._goal_states = [self.getGoalState(i) for i in range(self.n)]
+        return self._goal_states
+
+
+    # Packs a tray into an integer
+    def encodeTray(self, tray):
+        state = 0
+        for tile in tray:
+            state = (state << 2) | CELL_CODES[tile]
+        return (state << self.blank_bits) | list(tray).index(' ')
+
+
+    # Unpacks an integer state into a tray
+    def decodeTray(self, state):
+        return [CELL_CHARS[(state >> shift) & 3] for shift in self.cell_shifts]
+
+
+    # Returns the number of trays with the same tiles as the puzzle
+    def getStateCount(self):
+        return math.factorial(self.n) // (math.factorial(self.blacks) * math.factorial(self.whites))
+
+
+    # Returns the rank of a packed state, i.e. its index in the lexicographic order of all
+    # the trays with the same tiles. Ranks go from 0 to getStateCount() - 1.
+    def rankState(self, state):
+        counts = [1, self.blacks, self.whites]
+        total = self.getStateCount()
+        remaining = self.n
+        rank = 0
+        for shift in self.cell_shifts:
+            code = (state >> shift) & 3
+            for smaller in range(code):
+                rank += total * counts[smaller] // remaining
+            total = total * counts[code] // remaining
+            counts[code] -= 1
+            remaining -= 1
+        return rank
+
+
+    # Returns the packed state with the given rank
+    def unrankState(self, rank):
+        counts = [1, self.blacks, self.whites]
+        total = self.getStateCount()
+        remaining = self.n
+        state = 0
+        empty = 0
+        for i in range(self.n):
+            for code in range(3):
+                block = total * counts[code] // remaining
+                if rank < block:
+                    break
+                rank -= block
+            if code == 0:
+                empty = i
+            state = (state << 2) | code
+            total = block
+            counts[code] -= 1
+            remaining -= 1
+        return (state << self.blank_bits) | empty
+
+
+    # Returns the packed children of a packed state along with the cost of each move
+    def getPackedChildren(self, state, table=None):
+        table = self.astar_moves if table is None else table
+        return [((state ^ masks[(state >> shift) & 3]) + delta, cost)
+                for shift, masks, delta, cost in table[state & self.blank_mask]]
+
+
+    # Moves the tile 'offset' cells away from the empty space 'i' into it. A move is illegal
+    # when the tile would leave the tray or hop over more than max_hop tiles.
+    # Works on both list trays (returns [] for an illegal move) and packed
+    # states (returns None for an illegal move).
+    def moveTile(self, i, offset, tray):
+        if isinstance(tray, int):
+            for shift, masks, delta, cost in self.astar_moves[i]:
+                if delta == offset:
+                    return (tray ^ masks[(tray >> shift) & 3]) + delta
+            return None
+
+        if 0 <= i + offset < self.n and abs(offset) <= self.max_hop + 1:
+            tray[i] = tray[i + offset]
+            tray[i + offset] = ' '
+            return tray
+        return []
 
 
     # Returns the tray after performing shift operation 
     def shiftTile(self, i, direction, tray):
-        if direction == 'left':
-            if i < self.n - 1:
-                tray[i] = tray[i + 1]
-                tray[i + 1] = ' '
-                return tray
-            else:
-                return []
-
-        if direction == 'right':
-            if i > 0:
-                tray[i] = tray[i - 1]
-                tray[i - 1] = ' '
-                return tray
-            else:
-                return []
+        return self.moveTile(i, 1 if direction == 'left' else -1, tray)
         
 
     # Returns the tray after performing hop operation 
     def hopOneTile(self, i, direction, tray):
-        if direction == 'left':
-            if i < self.n - 2:
-                tray[i] = tray[i + 2]
-                tray[i + 2] = ' '
-                return tray
-            else:
-                return []
-
-        if direction == 'right':
-            if i > 1:
-                tray[i] = tray[i - 2]
-                tray[i - 2] = ' '
-                return tray
-            else:
-                return []
+        return self.moveTile(i, 2 if direction == 'left' else -2, tray)
         
 
     # Returns the tray after performing double hop operation
     def hopTwoTiles(self, i, direction, tray):
-        if direction == 'left':
-            if i < self.n -3:
-                tray[i] = tray[i + 3]
-                tray[i + 3] = ' '
-                return tray
-            else:
-                return []
-
-        if direction == 'right':
-            if i > 2:
-                tray[i] = tray[i - 3]
-                tray[i - 3] = ' '
-                return tray
-            else:
-                return []
+        return self.moveTile(i, 3 if direction == 'left' else -3, tray)
 
 
     # Checks it the tray is in goal state
     def isGoal(self, tray):
-        black, white, index = 0, 0, 0
-        while black != 1:
-            if tray[index] == 'B':
-                black += 1
-            elif tray[index] == 'W':
-                white += 1
-            if white == (self.n // 2):
-                return True
-            index += 1
-        
-        return False
+        if not isinstance(tray, int):
+            tray = self.encodeTray(tray)
+        return tray == self.goal_codes[tray & self.blank_mask]
 
 
     # Returns the index of empty space in the tray
     def getEmptyIndex(self, tray):
+        if isinstance(tray, int):
+            return tray & self.blank_mask
         return tray.index(' ')
 
 
     # Returns all the poosible children nodes that can be
     # generated from a parent(tray) by performing hops and shifts.
     def getPossibleChildren(self, parent):
-        results = []
-        empty = self.getEmptyIndex(parent)
-
-        results.append(self.hopOneTile(empty, 'left', list(parent)))
-        results.append(self.hopOneTile(empty, 'right', list(parent)))        
-        results.append(self.shiftTile(empty, 'left', list(parent)))
-        results.append(self.shiftTile(empty, 'right', list(parent)))
-        results.append(self.hopTwoTiles(empty, 'left', list(parent)))
-        results.append(self.hopTwoTiles(empty, 'right', list(parent)))
-
-        children = [child for child in results if len(child) > 0]
-        return children
+        return [self.decodeTray(child) for child, cost in self.getPackedChildren(self.encodeTray(parent), self.bfs_moves)]
 
 
-    # Converts a list to string
+    # Converts a list (or a packed state) to string
     def convertToString(self, tray):
+        if isinstance(tray, int):
+            tray = self.decodeTray(tray)
         return ''.join(tray)
 
 
     # The core function to solve the puzzle using Breadth First Search
     # This method only solves and saves the required information and does not
-    # print the required path or cost.
-    def solveBFS(self, print_tree=False):
-        self.bfs = {}
-        parents = []
-        new_parents = []
+    # print the required path or cost. The events of the search are reported
+    # to 'trace' if a trace sink (see tracing.py) is given.
+    def solveBFS(self, print_tree=False, trace=None):
+        self.bfs = NodeStore()
+        moves = self.bfs_moves
+        blank_mask = self.blank_mask
 
         if print_tree:
             print('--------------------------------')
             print('Resulting search graph of BFS\n--------------------------------')
             print('\nRoot - 0 || Parent - -1')
-            self.printTray(self.tray)
-
-        new_parents.append(self.tray)
-        self.bfs[self.convertToString(new_parents[0])] = {}
-        self.bfs[self.convertToString(new_parents[0])]['parent'] = -1
-        self.bfs[self.convertToString(new_parents[0])]['count'] = 0
-
-        count = 1
-        finished = False
-
-        while not finished:
-            parents = list(new_parents)
+            self.printTray(self.start)
+
+        new_parents = [self.start]
+        self.bfs.add(self.start, -1, 0, 0)
+        self.bfs_goal = []
+        self.expanded = 0
+        finished = self.isGoal(self.start)
+        if trace is not None:
+            trace.start(self, 'bfs')
+            trace.emit(GENERATED, 0, -1, self.start, 0)
+        if finished:
+            self.bfs_goal = self.start
+            if trace is not None:
+                trace.emit(GOAL, 0, -1, self.start, 0)
+
+        while not finished and new_parents:
+            parents = new_parents
             new_parents = []
             for parent in parents:
-                children = self.getPossibleChildren(parent)
-                for child in children:
-                    if self.convertToString(child) not in self.bfs:
-                        self.bfs[self.convertToString(child)] = {}
-                        self.bfs[self.convertToString(child)]['count'] = count
-                        self.bfs[self.convertToString(child)]['parent'] = self.bfs[self.convertToString(parent)]['count']
-
+                self.expanded += 1
+                parent_count = self.bfs.getNode(parent)
+                parent_g = self.bfs.g[parent_count]
+                if trace is not None:
+                    trace.emit(EXPANDED, parent_count, self.bfs.parents[parent_count], parent, parent_g)
+                for shift, masks, delta, cost in moves[parent & blank_mask]:
+                    child = (parent ^ masks[(parent >> shift) & 3]) + delta
+                    if child not in self.bfs:
+                        count = self.bfs.add(child, parent_count, parent_g + cost, cost)
                         new_parents.append(child)
-                        count += 1
+                        if trace is not None:
+                            trace.emit(GENERATED, count, parent_count, child, parent_g + cost)
 
                         if print_tree:
-                            print('Node - ' + str(self.bfs[self.convertToString(child)]['count']), end='')
-                            print(' || Parent - ' + str(self.bfs[self.convertToString(child)]['parent']), end='')
-                            action = self.getCost(child, parent)
-                            hop = ""
-                            if action == 1:
-                                hop = "Hop/Slide"
-                            else:
-                                hop = "Double hop"
-                            print(' || Action - ' + str(hop))
+                            print('Node - ' + str(count), end='')
+                            print(' || Parent - ' + str(parent_count), end='')
+                            self.printAction(cost)
                             self.printTray(child)
 
-                    if (self.isGoal(child)):
+                    if child == self.goal_codes[child & blank_mask]:
                         self.bfs_goal = child
                         finished = True
+                        if trace is not None:
+                            node = self.bfs.getNode(child)
+                            trace.emit(GOAL, node, self.bfs.parents[node], child, self.bfs.g[node])
                         break
                 
                 if finished:
                     break
+        self.generated = len(self.bfs)
 
 
     # Returns the cost to go from state 'a' to state 'b'
     def getCost(self, a, b):
-        diff = abs(a.index(' ') - b.index(' '))
+        diff = abs(self.getEmptyIndex(a) - self.getEmptyIndex(b))
 
         if diff == 1:
             return diff
@@ -191,48 +419,31 @@ class Puzzle:
     # Prints the cost and the solution path for BFS.
     # solveBFS() needs to be called before calling this method
     def getSolutionBfs(self):
-        temp = list(self.bfs_goal)
-        result = []
-        result.append(temp)
-        cost = []
-        while (self.convertToString(temp) != self.convertToString(self.tray)):
-            parent_node_num = self.bfs[self.convertToString(temp)]['parent']
-            get_parent = self.getKey(parent_node_num, False)
-            result.append(list(get_parent))
-            temp_cost = self.getCost(self.convertToString(temp), get_parent)
-            cost.append(temp_cost)
-            temp = list(get_parent)
-
-        cost.append(0)
+        path = self.bfs.getPath(self.bfs.getNode(self.bfs_goal))
 
         print('-----------------------\nSolution Path for BFS\n-----------------------\n')
-        for i in range(len(result) - 1, -1, -1):
-            print('Node - ' + str(self.bfs[self.convertToString(result[i])]['count']) + " || Cost: " + str(sum(cost[i:])), end='')
-            action = cost[i]
-            hop = ""
-            if action == 1:
-                hop = "Hop/Slide"
-                print(' || Action - ' + str(hop))
-            elif action == 2:
-                hop = "Double hop"
-                print(' || Action - ' + str(hop))
-            else:
-                print('\n')
-            self.printTray(result[i])
+        for node in path:
+            print('Node - ' + str(node) + " || Cost: " + str(self.bfs.g[node]), end='')
+            self.printAction(self.bfs.actions[node])
+            self.printTray(self.bfs.states[node])
             
-        print('Total Cost of minimum solution path for BFS: ' + str(sum(cost)))
+        print('Total Cost of minimum solution path for BFS: ' + str(self.bfs.g[path[-1]]))
 
 
     # Heuristic Function defined for A* search algorithm
     def wrongSideHeuristic(self, tray):
+        if not isinstance(tray, int):
+            tray = self.encodeTray(tray)
+
         cost = 0
         index = self.n - 1
-        black = self.n // 2
+        black = self.blacks
 
         while index >= 0 and black != 0:
-            if tray[index] == 'W':
+            code = (tray >> self.cell_shifts[index]) & 3
+            if code == 2:
                 cost += black
-            if tray[index] == 'B':
+            elif code == 1:
                 black -= 1
             index -= 1
         
@@ -240,247 +451,699 @@ class Puzzle:
         
 
     # Generates children for a particular parent in A* and saves the cost
-    # to reach the children node to the priority queue.
+    # to reach the children node to the priority queue. A node reached with a
+    # lower cost is re-parented and queued again; its older entries in the
+    # queue are skipped when they are popped.
     def generateChildren(self, parent):
-        results = []
-        empty = self.getEmptyIndex(parent)
-        results.append(self.shiftTile(empty, 'left', list(parent)))
-        results.append(self.shiftTile(empty, 'right', list(parent)))
-        results.append(self.hopOneTile(empty, 'left', list(parent)))
-        results.append(self.hopOneTile(empty, 'right', list(parent)))
-        results.append(self.hopTwoTiles(empty, 'left', list(parent)))
-        results.append(self.hopTwoTiles(empty, 'right', list(parent)))
-
-        ref = [1, 1, 1, 1, 2, 2]
-        aux = [(element, hop) for element, hop in zip(results, ref) if len(element) > 0]
-        results = aux
-
-        for node in results:
-            g_n = node[1] + self.astar[self.convertToString(parent)]['f(n)'] - self.wrongSideHeuristic(parent)
-            h_n = self.wrongSideHeuristic(node[0])
-            current_cost = g_n + h_n
-
-            if self.convertToString(node[0]) not in self.closed:
-                if self.convertToString(node[0]) not in self.astar:
-                    self.priority_queue.put((current_cost, (node[0], self.astar[self.convertToString(parent)]['count'])))
-                    self.astar[self.convertToString(node[0])] = {}
-                    self.astar[self.convertToString(node[0])]['f(n)'] = current_cost
-                    self.a_count += 1                    
-                    self.astar[self.convertToString(node[0])]['count'] = self.a_count
-                    self.astar[self.convertToString(node[0])]['parent'] = self.astar[self.convertToString(parent)]['count']
-
-
-                else:
-                    if self.astar[self.convertToString(node[0])]['f(n)'] > current_cost:
-                        self.astar[self.convertToString(node[0])]['f(n)'] = current_cost
+        if self.stats is not None:
+            self.stats.timeExpansion(self, parent)
+        else:
+            self.expandAStar(parent, heapq.heappush, self.astar.add, self.reparentAStar)
+
+
+    # Generates the children of 'parent' in A* with the given functions to push an entry to
+    # the priority queue, add a node and re-parent a node, which SearchStats replaces with
+    # timed ones
+    def expandAStar(self, parent, push, add, reparent):
+        astar = self.astar
+        heuristic = self.heuristic
+        frontier = self.frontier
+        trace = self.trace
+        parent_num = astar.getNode(parent)
+        parent_g = astar.g[parent_num]
+
+        for shift, masks, delta, cost in self.astar_moves[parent & self.blank_mask]:
+            node = (parent ^ masks[(parent >> shift) & 3]) + delta
+            g_n = cost + parent_g
+
+            if node not in astar:
+                h_n = heuristic(node)
+                self.a_count = add(node, parent_num, g_n, cost, h_n)
+                push(frontier, (g_n + h_n, node, parent_num, g_n))
+                if trace is not None:
+                    trace.emit(GENERATED, self.a_count, parent_num, node, g_n)
 
             else:
-                if self.astar[self.convertToString(node[0])]['f(n)'] > current_cost:
-                    self.astar[self.convertToString(node[0])]['f(n)'] = current_cost
-                    self.astar[self.convertToString(node[0])]['parent'] = self.astar[self.convertToString(parent)]['count']
-
+                node_num = astar.getNode(node)
+                if astar.g[node_num] > g_n:
+                    reparent(node_num, parent_num, g_n, cost)
+                    push(frontier, (g_n + astar.h[node_num], node, parent_num, g_n))
+                    if trace is not None:
+                        trace.emit(REPARENT, node_num, parent_num, node, g_n)
+
+
+    # Gives a node of A* a lower cost through a new parent and reopens it if it was closed
+    def reparentAStar(self, node_num, parent_num, g_n, cost):
+        astar = self.astar
+        astar.g[node_num] = g_n
+        astar.parents[node_num] = parent_num
+        astar.actions[node_num] = cost
+        self.closed.discard(astar.states[node_num])
+
+
+    # Prints a node popped from the priority queue of A*
+    def printAStarNode(self, parent, parent_node_num):
+        node = self.astar.getNode(parent)
+        print('Node - ' + str(node), end='')
+        print(' || Parent - ' + str(parent_node_num), end='')
+        print(' || f(n) - ' + str(self.getF(node)), end='')
+        self.printAction(self.astar.actions[node])
+
+
+    # Resets the data of A* and pushes the initial state to the priority queue
+    def initAStar(self, trace=None):
+        self.astar = NodeStore()
+        self.astar_goal = []
+        self.trace = trace
+        self.closed = set()
+        h_n = self.heuristic(self.start)
+        self.frontier = [(h_n, self.start, -1, 0)]
+        self.a_count = 0
+        self.expanded = 0
+        self.astar.add(self.start, -1, 0, 0, h_n)
+        if trace is not None:
+            trace.start(self, 'astar')
+            trace.emit(GENERATED, 0, -1, self.start, 0)
+
+
+    # Pops the next node to be expanded in A* and marks it as closed.
+    # Returns (state, parent node number) or None when the queue is empty.
+    def popAStar(self):
+        if self.stats is not None:
+            start = time.perf_counter()
+            node = self.popAStarNode()
+            self.stats.timers['queue'] += time.perf_counter() - start
+            return node
+        return self.popAStarNode()
+
+
+    # Pops the next node of A* which is neither closed nor superseded by a lower g(n)
+    def popAStarNode(self):
+        while self.frontier:
+            f_n, parent, parent_node_num, g_n = heapq.heappop(self.frontier)
+            if parent in self.closed or g_n != self.astar.g[self.astar.getNode(parent)]:
+                continue
+            self.closed.add(parent)
+            self.expanded += 1
+            if self.trace is not None:
+                node = self.astar.getNode(parent)
+                self.trace.emit(EXPANDED, node, self.astar.parents[node], parent, g_n)
+            return parent, parent_node_num
+        return None
 
 
     # The core function to solve the puzzle using A*. 
     # This method only solves the puzzle and stores the relevant information
-    # and is not used for printing the cost and the solution path.
-    def solveAStar(self, print_tree=False):
-        self.astar = {}
-        self.closed = []
-        self.priority_queue = PriorityQueue()
-
+    # and is not used for printing the cost and the solution path. The events
+    # of the search are reported to 'trace' if a trace sink is given.
+    def solveAStar(self, print_tree=False, trace=None):
         if print_tree:
             print('--------------------------------')
             print('Resulting search path of A*\n--------------------------------')
 
-        parent = list(self.tray)
-        self.priority_queue.put((self.wrongSideHeuristic(parent), (parent, -1)))
-        self.a_count = 0
-
-        self.astar[self.convertToString(parent)] = {}
-        self.astar[self.convertToString(parent)]['f(n)'] = self.wrongSideHeuristic(parent)
-        self.astar[self.convertToString(parent)]['count'] = self.a_count
-        self.astar[self.convertToString(parent)]['parent'] = -1
-
+        self.initAStar(trace)
         finished = False
 
         while not finished:
-            parent_node = self.priority_queue.get(False)
-            self.priority_queue.task_done()
-
-            parent = parent_node[1][0]
-            parent_node_num = parent_node[1][1]
+            parent_node = self.popAStar()
+            if parent_node is None:
+                break
 
-            self.closed.append(self.convertToString(parent))
+            parent, parent_node_num = parent_node
             self.generateChildren(parent)
 
-            if print_tree:                        
-                print('Node - ' + str(self.astar[self.convertToString(parent)]['count']), end='')
-                print(' || Parent - ' + str(parent_node_num), end='')
-                print(' || f(n) - ' + str(self.astar[self.convertToString(parent)]['f(n)']), end='')
-                action = self.getCost(parent, self.getKey(self.astar[self.convertToString(parent)]['parent']))
-                hop = ""
-                if action == 1:
-                    hop = "Hop/Slide"
-                    print(' || Action - ' + str(hop))
-                elif action == 2:
-                    hop = "Double hop"
-                    print(' || Action - ' + str(hop))
-                if parent_node_num == -1:
-                    print('\n')
+            if print_tree:
+                self.printAStarNode(parent, parent_node_num)
                 self.printTray(parent)
 
-            if (self.isGoal(parent)):
+            if self.isGoal(parent):
                 self.astar_goal = parent
                 finished = True
+                if trace is not None:
+                    node = self.astar.getNode(parent)
+                    trace.emit(GOAL, node, self.astar.parents[node], parent, self.astar.g[node])
+                break
+        self.generated = len(self.astar)
+
+
+    # Iterative deepening A*: a depth-first search that prunes the nodes with f(n) = g(n) + h(n)
+    # above a bound, repeated with the smallest f(n) that was pruned until a goal is found.
+    # Only the current path is kept in memory, so the memory used is proportional to the depth
+    # of the solution. The move that undoes the previous one is never generated and the states
+    # already on the path are skipped.
+    # A transposition table of 'table_size' slots remembers states expanded during an iteration
+    # along with their g(n), and a state reached again at no lower cost is pruned. A hash of the
+    # state picks a bucket of two slots: the first keeps the state with the lowest g(n), whose
+    # subtree is the largest, and the second always takes the latest state. States are replaced
+    # rather than dropped, so the table keeps working on boards with more states than slots
+    # while the memory used stays bounded. Without it (table_size=0) the transpositions are
+    # expanded again and again, e.g. 15.9M expansions instead of 25k for 'BBBBB WWWWW'.
+    def solveIDAStar(self, print_tree=False, table_size=IDASTAR_TABLE_SIZE):
+        self.expanded = 0
+        self.generated = 0
+        self.idastar_table_size = table_size
+        self.idastar_path = [self.start]
+        self.idastar_actions = [0]
+        self.idastar_goal = []
+        on_path = {self.start}
+
+        bound = self.heuristic(self.start)
+        while True:
+            if print_tree:
+                print('--------------------------------')
+                print('IDA* iteration with bound ' + str(bound) + '\n--------------------------------')
+            self.idastar_table = [None] * (max(1, table_size >> 1) << 1) if table_size else []
+            result = self.searchIDAStar(on_path, 0, bound, 0, print_tree)
+            if result is True:
+                self.idastar_goal = self.idastar_path[-1]
+                return
+            if result is None:
+                return
+            bound = result
+
+
+    # Depth-first search of IDA* from the last state of the current path. Returns True when a
+    # goal is found, otherwise the smallest f(n) above the bound (None if there is none).
+    def searchIDAStar(self, on_path, g_n, bound, last_delta, print_tree):
+        state = self.idastar_path[-1]
+        self.generated += 1
+        f_n = g_n + self.heuristic(state)
+        if f_n > bound:
+            return f_n
+        if print_tree:
+            print('Depth - ' + str(len(self.idastar_path) - 1) + ' || f(n) - ' + str(f_n), end='')
+            self.printAction(self.idastar_actions[-1])
+            self.printTray(state)
+        if state == self.goal_codes[state & self.blank_mask]:
+            return True
+
+        if self.idastar_table_size:
+            table = self.idastar_table
+            slot = (((state * IDASTAR_HASH) & HASH_MASK) * (len(table) >> 1) >> 64) << 1
+            kept, recent = table[slot], table[slot + 1]
+            if kept is not None and kept[0] == state and kept[1] <= g_n:
+                return None
+            if recent is not None and recent[0] == state and recent[1] <= g_n:
+                return None
+            if kept is None or g_n <= kept[1]:
+                table[slot] = (state, g_n)
+            else:
+                table[slot + 1] = (state, g_n)
+
+        self.expanded += 1
+        minimum = None
+        for shift, masks, delta, cost in self.astar_moves[state & self.blank_mask]:
+            if delta == -last_delta:
+                continue
+            child = (state ^ masks[(state >> shift) & 3]) + delta
+            if child in on_path:
+                continue
+
+            self.idastar_path.append(child)
+            self.idastar_actions.append(cost)
+            on_path.add(child)
+            result = self.searchIDAStar(on_path, g_n + cost, bound, delta, print_tree)
+            if result is True:
+                return True
+            on_path.discard(child)
+            self.idastar_path.pop()
+            self.idastar_actions.pop()
+
+            if result is not None and (minimum is None or result < minimum):
+                minimum = result
+        return minimum
+
+
+    # Prints the cost and the solution path for IDA*.
+    # solveIDAStar() needs to be called before calling this method
+    def getSolutionIDAStar(self):
+        print('-----------------------\nSolution Path for IDA*\n-----------------------\n')
+        total = 0
+        for depth, (state, action) in enumerate(zip(self.idastar_path, self.idastar_actions)):
+            total += action
+            print('Depth - ' + str(depth) + " || Cost: " + str(total), end='')
+            self.printAction(action)
+            self.printTray(state)
+        print('Total Cost of minimum solution path for IDA*: ' + str(total))
+
+
+    # Bidirectional uniform-cost search: one search runs forward from the initial state and one
+    # runs backward from all the goal states, always expanding the side with the smaller frontier.
+    # Every move is undone by the opposite move at the same cost, so the backward search uses the
+    # same move tables. Whenever a state is reached by both searches the cost of the path through
+    # it is recorded, and the search stops once the lowest costs of both frontiers add up to at
+    # least the best recorded cost, which proves that path optimal.
+    # This method only solves and saves the required information and does not print the path.
+    def solveBidirectional(self):
+        self.forward = NodeStore()
+        self.backward = NodeStore()
+        self.expanded = 0
+        self.bidirectional_path = []
+        self.bidirectional_actions = []
+
+        self.forward.add(self.start, -1, 0, 0)
+        forward_frontier = [(0, self.start)]
+        backward_frontier = []
+        for goal in self.goal_codes:
+            self.backward.add(goal, -1, 0, 0)
+            backward_frontier.append((0, goal))
+
+        best, meet = None, None
+        if self.start in self.backward:
+            best, meet = 0, self.start
+
+        moves = self.astar_moves
+        blank_mask = self.blank_mask
+        settled = (set(), set())
+
+        while forward_frontier and backward_frontier:
+            if best is not None and forward_frontier[0][0] + backward_frontier[0][0] >= best:
                 break
 
+            if len(forward_frontier) <= len(backward_frontier):
+                side, frontier, nodes, other = 0, forward_frontier, self.forward, self.backward
+            else:
+                side, frontier, nodes, other = 1, backward_frontier, self.backward, self.forward
+
+            g_n, parent = heapq.heappop(frontier)
+            if parent in settled[side]:
+                continue
+            settled[side].add(parent)
+            self.expanded += 1
+            parent_num = nodes.getNode(parent)
+
+            for shift, masks, delta, cost in moves[parent & blank_mask]:
+                child = (parent ^ masks[(parent >> shift) & 3]) + delta
+                child_g = g_n + cost
+                if child not in nodes:
+                    nodes.add(child, parent_num, child_g, cost)
+                elif child_g < nodes.g[nodes.getNode(child)]:
+                    child_num = nodes.getNode(child)
+                    nodes.g[child_num] = child_g
+                    nodes.parents[child_num] = parent_num
+                    nodes.actions[child_num] = cost
+                else:
+                    continue
+                heapq.heappush(frontier, (child_g, child))
+
+                if child in other:
+                    total = child_g + other.g[other.getNode(child)]
+                    if best is None or total < best:
+                        best, meet = total, child
+
+        self.generated = len(self.forward) + len(self.backward)
+        if meet is None:
+            return
+
+        path = self.forward.getPath(self.forward.getNode(meet))
+        self.bidirectional_path = [self.forward.states[node] for node in path]
+        self.bidirectional_actions = [self.forward.actions[node] for node in path]
+        node = self.backward.getNode(meet)
+        while self.backward.parents[node] != -1:
+            self.bidirectional_actions.append(self.backward.actions[node])
+            node = self.backward.parents[node]
+            self.bidirectional_path.append(self.backward.states[node])
+
+
+    # Prints the cost and the solution path for the bidirectional search.
+    # solveBidirectional() needs to be called before calling this method
+    def getSolutionBidirectional(self):
+        print('-----------------------\nSolution Path for Bidirectional Search\n-----------------------\n')
+        total = 0
+        for depth, (state, action) in enumerate(zip(self.bidirectional_path, self.bidirectional_actions)):
+            total += action
+            print('Node - ' + str(depth) + " || Cost: " + str(total), end='')
+            self.printAction(action)
+            self.printTray(state)
+        print('Total Cost of minimum solution path for Bidirectional Search: ' + str(total))
+
+
+    # Anytime Repairing A* (ARA*): a series of weighted A* searches with f(n) = g(n) + w * h(n),
+    # starting with w = 'weight' and lowering it by 'step' down to 'final_weight' after each search.
+    # Each search reuses the g(n) values of the previous ones: the states whose g(n) was lowered
+    # after they were expanded are kept aside and only expanded again by the next search.
+    # The search stops when the time limit (in seconds) or the node budget runs out, after the
+    # search with the final weight, or as soon as the best path is proven optimal. With a 'step' of
+    # 0 a single search is run, which is weighted A* (see solveWeightedAStar()). The best path
+    # found so far is kept in self.anytime_path along with its cost and a proven bound on its
+    # suboptimality: its cost divided by the lowest g(n) + h(n) of the states left to expand,
+    # which is a lower bound on the minimum cost for any admissible heuristic. Every improvement
+    # is recorded in self.anytime_solutions. Returns True if a path was found. The events of the
+    # search are reported to 'trace' if a trace sink is given.
+    def solveARAStar(self, weight=2.5, final_weight=1.0, step=0.5, time_limit=None, max_expansions=None, trace=None):
+        clock = time.perf_counter
+        started = clock()
+        deadline = None if time_limit is None else started + time_limit
+        self.anytime = NodeStore()
+        self.anytime_path = []
+        self.anytime_actions = []
+        self.anytime_cost = None
+        self.anytime_bound = None
+        self.anytime_solutions = []
+        self.expanded = 0
+        self.trace = trace
+
+        nodes = self.anytime
+        nodes.add(self.start, -1, 0, 0, self.heuristic(self.start))
+        if trace is not None:
+            trace.start(self, 'arastar' if weight > final_weight else 'weighted')
+            trace.emit(GENERATED, 0, -1, self.start, 0)
+        open_states = set()                                     #States to expand in the current search
+        incons = {self.start}                                   #States whose g(n) was lowered after their expansion
+        best = self.start if self.isGoal(self.start) else None
+        weight = max(weight, final_weight)
+
+        while True:
+            open_states |= incons
+            incons = set()
+            frontier = []
+            for state in open_states:
+                node = nodes.getNode(state)
+                frontier.append((nodes.g[node] + weight * nodes.h[node], state, nodes.g[node]))
+            heapq.heapify(frontier)
+
+            finished, best = self.improveARAStar(frontier, open_states, incons, best, weight, deadline, max_expansions)
+            self.recordARAStar(best, open_states | incons, clock() - started)
+            if not finished or self.anytime_bound == 1 or step <= 0 or weight <= final_weight and not incons:
+                break
+            weight = max(final_weight, weight - step)
+
+        self.generated = len(nodes)
+        return best is not None
+
+
+    # One weighted A* search of ARA*, which expands the states of 'frontier' until the best goal
+    # found costs no more than the lowest f(n) left. Returns (False if the time limit or the node
+    # budget ran out, best goal state found so far).
+    def improveARAStar(self, frontier, open_states, incons, best, weight, deadline, max_expansions):
+        nodes = self.anytime
+        heuristic = self.heuristic
+        moves = self.astar_moves
+        blank_mask = self.blank_mask
+        goal_codes = self.goal_codes
+        trace = self.trace
+        clock = time.perf_counter
+        closed = set()
+        best_g = None if best is None else nodes.g[nodes.getNode(best)]
+
+        while frontier:
+            f_n, parent, g_n = frontier[0]
+            parent_num = nodes.getNode(parent)
+            if parent not in open_states or g_n != nodes.g[parent_num]:
+                heapq.heappop(frontier)
+                continue
+            if best_g is not None and best_g <= f_n:
+                break
+            if max_expansions is not None and self.expanded >= max_expansions or deadline is not None and clock() >= deadline:
+                return False, best
+
+            heapq.heappop(frontier)
+            open_states.discard(parent)
+            closed.add(parent)
+            self.expanded += 1
+            if trace is not None:
+                trace.emit(EXPANDED, parent_num, nodes.parents[parent_num], parent, g_n)
+
+            for shift, masks, delta, cost in moves[parent & blank_mask]:
+                child = (parent ^ masks[(parent >> shift) & 3]) + delta
+                child_g = g_n + cost
+                if child not in nodes:
+                    child_num = nodes.add(child, parent_num, child_g, cost, heuristic(child))
+                    if trace is not None:
+                        trace.emit(GENERATED, child_num, parent_num, child, child_g)
+                else:
+                    child_num = nodes.getNode(child)
+                    if nodes.g[child_num] <= child_g:
+                        continue
+                    nodes.g[child_num] = child_g
+                    nodes.parents[child_num] = parent_num
+                    nodes.actions[child_num] = cost
+                    if trace is not None:
+                        trace.emit(REPARENT, child_num, parent_num, child, child_g)
+
+                if child == goal_codes[child & blank_mask] and (best_g is None or child_g < best_g):
+                    best, best_g = child, child_g
+                    if trace is not None:
+                        trace.emit(GOAL, child_num, parent_num, child, child_g)
+                if child in closed:
+                    incons.add(child)
+                else:
+                    open_states.add(child)
+                    heapq.heappush(frontier, (child_g + weight * nodes.h[child_num], child, child_g))
+        return True, best
+
+
+    # Saves the path to the best goal of ARA* if it improves on the previous one, and its proven
+    # suboptimality bound given the states left to expand
+    def recordARAStar(self, best, remaining, seconds):
+        if best is None:
+            return
+        nodes = self.anytime
+        path = nodes.getPath(nodes.getNode(best))
+        actions = [nodes.actions[node] for node in path]
+        cost = sum(actions)
+        improved = self.anytime_cost is None or cost < self.anytime_cost
+        if improved:
+            self.anytime_path = [nodes.states[node] for node in path]
+            self.anytime_actions = actions
+            self.anytime_cost = cost
+
+        lower = self.anytime_cost
+        for state in remaining:
+            node = nodes.getNode(state)
+            lower = min(lower, nodes.g[node] + nodes.h[node])
+        bound = self.anytime_cost / lower if lower > 0 else (1.0 if self.anytime_cost == 0 else float('inf'))
+        if improved or bound < self.anytime_bound:
+            self.anytime_bound = bound
+            self.anytime_solutions.append((self.anytime_cost, bound, self.expanded, seconds))
+
+
+    # Weighted A*: a single search with f(n) = g(n) + weight * h(n), which finds a path costing at
+    # most 'weight' times the minimum cost with an admissible heuristic, usually expanding far fewer
+    # nodes than A*. Takes the same limits as solveARAStar() and saves its results the same way.
+    def solveWeightedAStar(self, weight=2.0, time_limit=None, max_expansions=None, trace=None):
+        return self.solveARAStar(weight, weight, 0, time_limit, max_expansions, trace)
+
+
+    # Prints the cost, the suboptimality bound and the path of weighted A* or ARA*.
+    # solveWeightedAStar() or solveARAStar() needs to be called before calling this method
+    def getSolutionAnytime(self):
+        print('-----------------------\nSolution Path for Anytime A*\n-----------------------\n')
+        if self.anytime_cost is None:
+            print('No solution found within the limits')
+            return
+        total = 0
+        for depth, (state, action) in enumerate(zip(self.anytime_path, self.anytime_actions)):
+            total += action
+            print('Node - ' + str(depth) + " || Cost: " + str(total), end='')
+            self.printAction(action)
+            self.printTray(state)
+        print('Total Cost of solution path for Anytime A*: ' + str(total) + ' (at most ' + str(self.anytime_bound) + ' times the minimum)')
+
+
+    # Solves the puzzle with one of ALGORITHMS without printing anything and returns
+    # (path, cost) with the states of the path as strings, or (None, None) if no goal
+    # can be reached. The number of nodes expanded is left in self.expanded. A trace
+    # sink (see tracing.py) is used by all but 'idastar' and 'bidirectional'. A SearchStats (see stats.py)
+    # given as 'stats' records the counters and timers of the solve. 'table_size' is the size of
+    # the transposition table of IDA*.
+    def solve(self, algorithm='astar', trace=None, stats=None, table_size=IDASTAR_TABLE_SIZE):
+        if stats is not None:
+            stats.attach(self, algorithm)
+            try:
+                return self.solve(algorithm, trace, table_size=table_size)
+            finally:
+                stats.detach(self)
+
+        if algorithm == 'bfs':
+            self.solveBFS(trace=trace)
+            if self.bfs_goal == []:
+                return None, None
+            nodes, node = self.bfs, self.bfs.getNode(self.bfs_goal)
+        elif algorithm == 'astar':
+            self.solveAStar(trace=trace)
+            if self.astar_goal == []:
+                return None, None
+            nodes, node = self.astar, self.astar.getNode(self.astar_goal)
+        elif algorithm == 'idastar':
+            self.solveIDAStar(table_size=table_size)
+            if self.idastar_goal == []:
+                return None, None
+            return [self.convertToString(state) for state in self.idastar_path], sum(self.idastar_actions)
+        elif algorithm == 'bidirectional':
+            self.solveBidirectional()
+            if not self.bidirectional_path:
+                return None, None
+            return [self.convertToString(state) for state in self.bidirectional_path], sum(self.bidirectional_actions)
+        elif algorithm in ('weighted', 'arastar'):
+            if not (self.solveWeightedAStar(trace=trace) if algorithm == 'weighted' else self.solveARAStar(trace=trace)):
+                return None, None
+            return [self.convertToString(state) for state in self.anytime_path], self.anytime_cost
+        else:
+            raise ValueError('Unknown algorithm: ' + str(algorithm))
+
+        return [self.convertToString(nodes.states[n]) for n in nodes.getPath(node)], nodes.g[node]
+
+
+    # Solves the puzzle with a precomputed DistanceTable (see distance_table.py) of the same
+    # board by following the best moves stored in it. Returns (path, cost) with the states
+    # of the path as strings, or (None, None) if no goal can be reached.
+    def solveWithTable(self, table):
+        if not table.matches(self):
+            raise ValueError('The distance table was built for a different board')
+        return table.getPath(self.tray)
+
 
     # Return the state of the puzzle(tray) according to the node number
     def getKey(self, val, informed = True): 
-        if informed:
-            for key, value in self.astar.items(): 
-                if val == value['count']: 
-                    return key 
-        
-            return "key doesn't exist"
-        
-        else:
-            for key, value in self.bfs.items(): 
-                if val == value['count']: 
-                    return key 
-        
-            return "key doesn't exist"
+        nodes = self.astar if informed else self.bfs
+        if 0 <= val < len(nodes):
+            return self.convertToString(nodes.states[val])
+        return "key doesn't exist"
+
+
+    # Returns f(n) = g(n) + h(n) of a node of A*
+    def getF(self, node):
+        return self.astar.g[node] + self.astar.h[node]
+
+
+    # Returns the path of A* from the initial state to 'goal'
+    def getPathAStar(self, goal):
+        return self.astar.getPath(self.astar.getNode(goal))
+
+
+    # Prints the nodes of a solution path found by A*
+    def printPathAStar(self, path):
+        for node in path:
+            print('Node ' + str(node) + " || f(n): " + str(self.getF(node)), end='')
+            self.printAction(self.astar.actions[node])
+            self.printTray(self.astar.states[node])
 
 
     # Prints the cost at each step and the solution path of the A* algorithm
     # solveAStar() needs to be called before this method
     def getSolutionAStar(self):
-        temp = list(self.astar_goal)
-        result = []
-        result.append(temp)
-        while (self.convertToString(temp) != self.convertToString(self.tray)):
-            parent_node_num = self.astar[self.convertToString(temp)]['parent']
-            get_parent = self.getKey(parent_node_num, True)
-            result.append(list(get_parent))
-            temp = list(get_parent)
-        
         print('-----------------------\nSolution Path for A*\n-----------------------\n')
-        for i in range(len(result) - 1, -1, -1):
-            print('Node ' + str(self.astar[self.convertToString(result[i])]['count']) + " || f(n): " + str(self.astar[self.convertToString(result[i])]['f(n)']), end='')
-            action = self.getCost(result[i], self.getKey(self.astar[self.convertToString(result[i])]['parent']))
-            hop = ""
-            if action == 1:
-                hop = "Hop/Slide"
-                print(' || Action - ' + str(hop))
-            elif action == 2:
-                hop = "Double hop"
-                print(' || Action - ' + str(hop))
-            else:
-                print('\n')
-            self.printTray(result[i])
-        
-        print('Total Cost of minimum solution path for A*: ' + str(self.astar[self.convertToString(self.astar_goal)]['f(n)']))
+        self.printPathAStar(self.getPathAStar(self.astar_goal))
+        print('Total Cost of minimum solution path for A*: ' + str(self.getF(self.astar.getNode(self.astar_goal))))
 
 
-    # An A* variation which generates paths for all the possible goal states.
-    # This method is used only to solve the problem and not for printing the cost.
-    def generateAllGoalsAStar(self, print_tree=False):
-        self.astar = {}
-        self.closed = []
-        self.priority_queue = PriorityQueue()
+    # A uniform-cost search (Dijkstra) from the initial state which generates the minimum cost
+    # paths to all the possible goal states in a single pass. Every goal is yielded as
+    # (goal, cost, path) as soon as it is settled, with the states given as strings, and
+    # the search stops once the last goal has been settled. The events of the search are
+    # reported to 'trace' if a trace sink is given.
+    def iterAllGoals(self, print_tree=False, trace=None):
+        self.dijkstra = NodeStore()
         self.covered_goal_states = []
 
         if print_tree:
             print('----------------------------------------------------------')
-            print('Resulting search path of A* for finding all goal states\n----------------------------------------------------------')
-            print('\nRoot - 0 || Parent - -1')
-
-        parent = list(self.tray)
-        self.priority_queue.put((self.wrongSideHeuristic(parent), (parent, -1)))
-        self.a_count = 0
+            print('Resulting search path of Dijkstra for finding all goal states\n----------------------------------------------------------')
+
+        nodes = self.dijkstra
+        moves = self.astar_moves
+        blank_mask = self.blank_mask
+        goal_codes = self.goal_codes
+        remaining = len(goal_codes)
+
+        nodes.add(self.start, -1, 0, 0)
+        frontier = [(0, self.start)]
+        settled = set()
+        self.expanded = 0
+        if trace is not None:
+            trace.start(self, 'dijkstra')
+            trace.emit(GENERATED, 0, -1, self.start, 0)
+
+        while frontier and remaining:
+            g_n, parent = heapq.heappop(frontier)
+            if parent in settled:
+                continue
+            settled.add(parent)
+            self.expanded += 1
+            parent_num = nodes.getNode(parent)
+            if trace is not None:
+                trace.emit(EXPANDED, parent_num, nodes.parents[parent_num], parent, g_n)
 
-        self.astar[self.convertToString(parent)] = {}
-        self.astar[self.convertToString(parent)]['f(n)'] = self.wrongSideHeuristic(parent)
-        self.astar[self.convertToString(parent)]['count'] = self.a_count
-        self.astar[self.convertToString(parent)]['parent'] = -1
-
-        finished = False     
-
-        while not finished:
-            parent_node = self.priority_queue.get(False)
-            self.priority_queue.task_done()
-
-            parent = parent_node[1][0]
-            parent_node_num = parent_node[1][1]
-
-            self.closed.append(self.convertToString(parent))
-            self.generateChildren(parent)
+            if print_tree:
+                print('Node - ' + str(parent_num) + ' || Parent - ' + str(nodes.parents[parent_num]) + ' || Cost - ' + str(g_n), end='')
+                self.printAction(nodes.actions[parent_num])
 
-            if print_tree:                        
-                print('Node - ' + str(self.astar[self.convertToString(parent)]['count']), end='')
-                print(' || Parent - ' + str(parent_node_num), end='')
-                print(' || f(n) - ' + str(self.astar[self.convertToString(parent)]['f(n)']), end='')
-                action = self.getCost(parent, self.getKey(self.astar[self.convertToString(parent)]['parent']))
-                hop = ""
-                if action == 1:
-                    hop = "Hop/Slide"
-                    print(' || Action - ' + str(hop))
-                elif action == 2:
-                    hop = "Double hop"
-                    print(' || Action - ' + str(hop))
-                if parent_node_num == -1:
-                    print('\n')
-
-            if (self.convertToString(parent) in self.goal_states and parent not in self.covered_goal_states):
+            if parent == goal_codes[parent & blank_mask]:
+                remaining -= 1
                 self.covered_goal_states.append(parent)
+                if trace is not None:
+                    trace.emit(GOAL, parent_num, nodes.parents[parent_num], parent, g_n)
                 if print_tree:
                     print('Goal State Reached!')
-                if len(self.covered_goal_states) == len(self.goal_states):
-                    finished = True
                     self.printTray(parent)
-                    break  
-            
-            if print_tree:
+                path = [self.convertToString(nodes.states[node]) for node in nodes.getPath(parent_num)]
+                self.generated = len(nodes)
+                yield self.convertToString(parent), g_n, path
+            elif print_tree:
                 self.printTray(parent)
 
+            for shift, masks, delta, cost in moves[parent & blank_mask]:
+                child = (parent ^ masks[(parent >> shift) & 3]) + delta
+                child_g = g_n + cost
+                if child not in nodes:
+                    child_num = nodes.add(child, parent_num, child_g, cost)
+                    heapq.heappush(frontier, (child_g, child))
+                    if trace is not None:
+                        trace.emit(GENERATED, child_num, parent_num, child, child_g)
+                elif child not in settled:
+                    child_num = nodes.getNode(child)
+                    if nodes.g[child_num] > child_g:
+                        nodes.g[child_num] = child_g
+                        nodes.parents[child_num] = parent_num
+                        nodes.actions[child_num] = cost
+                        heapq.heappush(frontier, (child_g, child))
+                        if trace is not None:
+                            trace.emit(REPARENT, child_num, parent_num, child, child_g)
+        self.generated = len(nodes)
+
+
+    # Generates the minimum cost paths for all the possible goal states and returns them as a
+    # list of (goal, cost, path). This method does not print the costs or the paths.
+    def generateAllGoals(self, print_tree=False, trace=None):
+        return list(self.iterAllGoals(print_tree, trace))
+
+
+    # Kept for compatibility, all the goal states are now generated by generateAllGoals()
+    def generateAllGoalsAStar(self, print_tree=False, trace=None):
+        return self.generateAllGoals(print_tree, trace)
+
+
+    # Prints the action taken to reach a node from its parent
+    def printAction(self, action):
+        if action == 1:
+            print(' || Action - Hop/Slide')
+        elif action == 2:
+            print(' || Action - Double hop')
+        elif action > 2:
+            print(' || Action - Hop over ' + str(action) + ' tiles')
+        else:
+            print('\n')
 
 
     # Used to print all the solution paths for all the goal states.
-    # generateAllGoalsAStar() needs to be called before this method
+    # generateAllGoals() needs to be called before this method
     def printAllGoals(self):
+        nodes = self.dijkstra
         for num, goal in enumerate(self.covered_goal_states):
-            temp = list(goal)
-            result = []
-            result.append(temp)
-            print('-----------------------\nGoal State - {} path for A*\n-----------------------\n'.format(num + 1))
-            while (self.convertToString(temp) != self.convertToString(self.tray)):
-                parent_node_num = self.astar[self.convertToString(temp)]['parent']
-                get_parent = self.getKey(parent_node_num, True)
-                result.append(list(get_parent))
-                temp = list(get_parent)
-
-            for i in range(len(result) - 1, -1, -1):
-                print('Node ' + str(self.astar[self.convertToString(result[i])]['count']) + " || f(n): " + str(self.astar[self.convertToString(result[i])]['f(n)']), end='')
-
-                action = self.getCost(result[i], self.getKey(self.astar[self.convertToString(result[i])]['parent']))
-                hop = ""
-                if action == 1:
-                    hop = "Hop/Slide"
-                    print(' || Action - ' + str(hop))
-                elif action == 2:
-                    hop = "Double hop"
-                    print(' || Action - ' + str(hop))
-                else:
-                    print('\n')
-                self.printTray(result[i])
-        
-            print('Total Cost of Goal {} solution path for A*: '.format(num + 1) + str(self.astar[self.convertToString(goal)]['f(n)']) + '\n')
+            print('-----------------------\nGoal State - {} path\n-----------------------\n'.format(num + 1))
+            for node in nodes.getPath(nodes.getNode(goal)):
+                print('Node ' + str(node) + " || Cost: " + str(nodes.g[node]), end='')
+                self.printAction(nodes.actions[node])
+                self.printTray(nodes.states[node])
+            print('Total Cost of Goal {} solution path: '.format(num + 1) + str(nodes.g[nodes.getNode(goal)]) + '\n')
 
 
 
     # Prints the current state(tray) in a readable format
     def printTray(self, tray):
+        if isinstance(tray, int):
+            tray = self.decodeTray(tray)
         print(' =============================')
         print(" | ", end = '')
 
@@ -492,12 +1155,12 @@ class Puzzle:
 
 if __name__ == '__main__':
 
-    input_string = 'BBW WWB'
-    puzzle = Puzzle(input_string)
-
-    #puzzle.solveBFS(print_tree=True)          # Uncomment this to run BFS
-    #puzzle.getSolutionBfs()                   # Uncomment this to display solution for BFS
-    # puzzle.solveAStar(print_tree=True)        # Uncomment this to run A*
-    # puzzle.getSolutionAStar()                 # Uncomment this to display solution for A*
-    # puzzle.generateAllGoalsAStar(print_tree=True)     # Uncomment to get all goals
-    # puzzle.printAllGoals()                            # Uncomment to display all goals
\ No newline at end of file
+    # Runs the command line interface of cli.py, e.g. python3 puzzle.py 'BBW WWB' -f text.
+    # The step by step displays of the searches are shown with --tree, or from Python with:
+    #   puzzle = Puzzle('BBW WWB')
+    #   puzzle.solveBFS(print_tree=True); puzzle.getSolutionBfs()
+    #   puzzle.solveAStar(print_tree=True); puzzle.getSolutionAStar()
+    #   puzzle.generateAllGoals(print_tree=True); puzzle.printAllGoals()
+    import sys
+    from cli import main
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch import SolveResult
+from puzzle import Puzzle, checkTray
+from tracing import TraceSink
+
+"""
+SolverService solves trays on request from a long-running asyncio program. A request is put in
+a bounded queue, so that callers wait (backpressure) once 'max_pending' requests are queued, and
+is taken by one of 'workers' tasks which runs the search in a thread of an executor, keeping the
+event loop free while it runs.
+Concurrent requests for the same tray and settings are coalesced into a single search whose
+result is shared by all of them. Each request can have a timeout; when a request times out or is
+cancelled and no other request waits for the same search, the search is stopped: it is given a
+CancelToken as trace sink (see tracing.py), which raises SolveCancelled from inside the search
+loop at its next event. Only the algorithms reporting trace events (SERVICE_ALGORITHMS) can be
+stopped this way, so only they are served.
+The service runs in-process and needs no network; it is used with 'async with':
+
+    async with SolverService(workers=2) as service:
+        result = await service.solve('BBW WWB', timeout=1.0)
+"""
+
+SERVICE_ALGORITHMS = ('bfs', 'astar', 'weighted', 'arastar')
+
+
+# Raised inside a search to stop it, and to the requests waiting for a search that was stopped
+class SolveCancelled(Exception):
+    pass
+
+
+"""
+CancelToken is a trace sink which stops the search it is given to, from any thread, once
+cancel() has been called.
+"""
+class CancelToken(TraceSink):
+
+    def __init__(self):
+        self.event = threading.Event()
+
+
+    def cancel(self):
+        self.event.set()
+
+
+    def emit(self, event, node, parent, state, g):
+        if self.event.is_set():
+            raise SolveCancelled()
+
+
+"""
+A search of the service, shared by all the requests for the same tray and settings
+"""
+class Job:
+
+    def __init__(self, key, future):
+        self.key = key                                          #(tray, algorithm, max_hop, heuristic)
+        self.future = future                                    #Result of the search, a SolveResult
+        self.token = CancelToken()
+        self.waiters = 0                                        #Number of requests waiting for the result
+        self.queued = False                                     #True once the job is in the queue of the service
+
+
+    # Runs the search, in a thread of the executor
+    def run(self):
+        if self.token.event.is_set():
+            raise SolveCancelled()
+        tray, algorithm, max_hop, heuristic = self.key
+        puzzle = Puzzle(tray, max_hop, heuristic)
+        start = time.perf_counter()
+        path, cost = puzzle.solve(algorithm, trace=self.token)
+        return SolveResult(tray, path, cost, puzzle.expanded, time.perf_counter() - start)
+
+
+class SolverService:
+
+    def __init__(self, workers=2, max_pending=100, timeout=None, max_hop=2, heuristic=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout                                  #Default timeout of the requests in seconds
+        self.max_hop = max_hop
+        self.heuristic = heuristic                              #Name of the heuristic (see heuristics.HEURISTICS)
+        self.executor = None
+        self.queue = None
+        self.tasks = []
+        self.jobs = {}                                          #Key -> Job queued or running
+        self.stats = {'requests': 0, 'coalesced': 0, 'solved': 0, 'cancelled': 0, 'timeouts': 0}
+
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+    # Starts the worker tasks. Called by 'async with'.
+    async def start(self):
+        self.executor = ThreadPoolExecutor(self.workers)
+        self.queue = asyncio.Queue(self.max_pending)
+        self.tasks = [asyncio.ensure_future(self.work()) for _ in range(self.workers)]
+
+
+    # Stops the running searches and the worker tasks
+    async def close(self):
+        for job in list(self.jobs.values()):
+            self.cancelJob(job)
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.executor.shutdown(wait=True)
+
+
+    # Takes the jobs from the queue and runs them in the executor, one at a time
+    async def work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.future.done():
+                    continue
+                try:
+                    result = await loop.run_in_executor(self.executor, job.run)
+                except Exception as error:
+                    if not job.future.done():
+                        job.future.set_exception(error)
+                else:
+                    self.stats['solved'] += 1
+                    if not job.future.done():
+                        job.future.set_result(result)
+            finally:
+                if self.jobs.get(job.key) is job:
+                    del self.jobs[job.key]
+                self.queue.task_done()
+
+
+    # Stops a job, whether it is queued or running
+    def cancelJob(self, job):
+        job.token.cancel()
+        if not job.future.done():
+            job.future.set_exception(SolveCancelled())
+            job.future.exception()
+        if self.jobs.get(job.key) is job:
+            del self.jobs[job.key]
+        self.stats['cancelled'] += 1
+
+
+    # Solves a tray and returns its SolveResult. Waits for room in the queue when it is full.
+    # Raises asyncio.TimeoutError after 'timeout' seconds (the default timeout of the service if
+    # None), and ValueError for invalid trays or algorithms.
+    async def solve(self, tray, algorithm='astar', timeout=None):
+        tray = ''.join(tray)
+        checkTray(tray)
+        if algorithm not in SERVICE_ALGORITHMS:
+            raise ValueError('Algorithm not served: ' + str(algorithm))
+        timeout = self.timeout if timeout is None else timeout
+        self.stats['requests'] += 1
+
+        key = (tray, algorithm, self.max_hop, self.heuristic)
+        job = self.jobs.get(key)
+        created = job is None
+        if created:
+            job = Job(key, asyncio.get_running_loop().create_future())
+            self.jobs[key] = job
+        else:
+            self.stats['coalesced'] += 1
+        job.waiters += 1
+
+        # Queues the job (only for the request which created it) and waits for its result
+        async def wait():
+            if created:
+                await self.queue.put(job)
+                job.queued = True
+            return await asyncio.shield(job.future)
+
+        try:
+            return await asyncio.wait_for(wait(), timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise
+        finally:
+            job.waiters -= 1
+            if job.waiters == 0 and not job.future.done():
+                self.cancelJob(job)
+            elif created and not job.queued and not job.future.done():
+                # Gave up while waiting for room in the queue, other requests still wait for the job
+                job.queued = True
+                asyncio.ensure_future(self.queue.put(job))
@@ -0,0 +1,173 @@
+import heapq
+from fractions import Fraction
+
+from puzzle import NodeStore, Puzzle, checkTray
+
+"""
+SolverSession answers repeated queries for the best continuation from a changing tray, as in
+interactive play where a move is made and the best path from the new tray is asked for.
+The goal states do not change between queries, only the tray to solve from does, so the session
+searches backward from all the goal states towards the current tray (every move is undone by the
+opposite move at the same cost, so the backward search uses the same move tables). Its search
+tree, whose g(n) is the cost from a state to a goal, stays valid whatever the current tray is and
+is kept between queries. After a move the session is re-rooted on the new tray: the states left
+to expand are given their priority towards it, and the search resumes from where it stopped,
+until the cost of the new tray is proven minimal. Closed states are reopened when their g(n) is
+lowered, so the costs are minimal for any admissible heuristic.
+The heuristic towards a tray matches the tiles of each colour in order between the two trays: a
+move of 'k' cells costs at least 'k' times the lowest cost per cell of the moves, so the matched
+distance scaled by that ratio is a lower bound on the cost. The matched distance is a metric, so
+the priorities computed towards an earlier tray, lowered by the distance between the two trays,
+are still lower bounds towards the new one. A tray reached at a cost no higher than these bounds
+is answered without expanding anything or recomputing the priorities, which is the usual case
+when the moves of the previous answers are played. To stay exact the priorities are kept as
+integers scaled by the denominator of the ratio.
+"""
+
+
+class SolverSession:
+
+    def __init__(self, tray, max_hop=2):
+        checkTray(tray)
+        self.puzzle = Puzzle(''.join(tray), max_hop)            #Board of the session, used for its move tables
+        self.nodes = NodeStore()                                #Backward search tree, the parent leads to a goal
+        self.frontier = []                                      #(scaled f(n) towards the keyed tray, state, g(n))
+        self.open_states = set()                                #States left to expand
+        self.closed = set()
+        self.ratio = min(Fraction(cost, abs(delta)) for moves in self.puzzle.astar_moves
+                         for shift, masks, delta, cost in moves)        #Lowest cost per cell moved
+        self.state = None                                       #Packed current tray
+        self.target = None                                      #Positions of the black and white tiles of the current tray
+        self.keyed = None                                       #Positions of the tiles of the tray the priorities are computed for
+        self.drift = 0                                          #Scaled distance between the keyed and the current tray
+        self.expanded = 0                                       #Nodes expanded by the last query
+        self.total_expanded = 0                                 #Nodes expanded by all the queries
+
+        for goal in self.puzzle.goal_codes:
+            self.nodes.add(goal, -1, 0, 0)
+            self.open_states.add(goal)
+        self.reroot(tray)
+
+
+    # Returns the positions of the black tiles and of the white tiles of a packed state
+    def getPositions(self, state):
+        codes = [(state >> shift) & 3 for shift in self.puzzle.cell_shifts]
+        return ([i for i, code in enumerate(codes) if code == 1],
+                [i for i, code in enumerate(codes) if code == 2])
+
+
+    # Returns the distance between two trays given by the positions of their tiles, with the
+    # tiles of each colour matched in order
+    def getDistance(self, positions, other):
+        distance = sum(abs(a - b) for a, b in zip(positions[0], other[0]))
+        return distance + sum(abs(a - b) for a, b in zip(positions[1], other[1]))
+
+
+    # Lower bound on the cost between a packed state and the keyed tray, scaled by the
+    # denominator of the ratio
+    def heuristic(self, state):
+        return self.getDistance(self.getPositions(state), self.keyed) * self.ratio.numerator
+
+
+    # Makes 'tray' the current tray of the session. It must have the same tiles as the first one.
+    def reroot(self, tray):
+        checkTray(tray)
+        tray = ''.join(tray)
+        puzzle = self.puzzle
+        if len(tray) != puzzle.n or tray.count('B') != puzzle.blacks:
+            raise ValueError('The tray does not have the same tiles as the session: ' + repr(tray))
+
+        self.state = puzzle.encodeTray(tray)
+        self.target = self.getPositions(self.state)
+        if self.keyed is None:
+            self.rekey()
+        else:
+            self.drift = self.getDistance(self.keyed, self.target) * self.ratio.numerator
+
+
+    # Computes the priorities of the states left to expand towards the current tray
+    def rekey(self):
+        nodes = self.nodes
+        scale = self.ratio.denominator
+        self.keyed = self.target
+        self.drift = 0
+        self.frontier = []
+        for state in self.open_states:
+            g_n = nodes.g[nodes.getNode(state)]
+            self.frontier.append((g_n * scale + self.heuristic(state), state, g_n))
+        heapq.heapify(self.frontier)
+
+
+    # Resumes the backward search until the cost of the current tray is proven minimal
+    def search(self):
+        nodes = self.nodes
+        open_states = self.open_states
+        closed = self.closed
+        moves = self.puzzle.astar_moves
+        blank_mask = self.puzzle.blank_mask
+        scale = self.ratio.denominator
+        target = self.state
+        self.expanded = 0
+        frontier = self.frontier
+
+        while frontier:
+            f_n, parent, g_n = frontier[0]
+            parent_num = nodes.getNode(parent)
+            if parent not in open_states or g_n != nodes.g[parent_num]:
+                heapq.heappop(frontier)
+                continue
+            if target in nodes and nodes.g[nodes.getNode(target)] * scale <= f_n - self.drift:
+                break
+            if self.drift:
+                self.rekey()
+                frontier = self.frontier
+                continue
+
+            heapq.heappop(frontier)
+            open_states.discard(parent)
+            closed.add(parent)
+            self.expanded += 1
+
+            for shift, masks, delta, cost in moves[parent & blank_mask]:
+                child = (parent ^ masks[(parent >> shift) & 3]) + delta
+                child_g = g_n + cost
+                if child not in nodes:
+                    nodes.add(child, parent_num, child_g, cost)
+                else:
+                    child_num = nodes.getNode(child)
+                    if nodes.g[child_num] <= child_g:
+                        continue
+                    nodes.g[child_num] = child_g
+                    nodes.parents[child_num] = parent_num
+                    nodes.actions[child_num] = cost
+                    closed.discard(child)
+                open_states.add(child)
+                heapq.heappush(frontier, (child_g * scale + self.heuristic(child), child, child_g))
+        self.total_expanded += self.expanded
+
+
+    # Returns (path, cost) of a minimum cost solution from the current tray, or from 'tray' after
+    # re-rooting the session on it, with the states of the path as strings. Returns (None, None)
+    # if no goal can be reached.
+    def solve(self, tray=None):
+        if tray is not None:
+            self.reroot(tray)
+        self.search()
+        if self.state not in self.nodes:
+            return None, None
+
+        nodes = self.nodes
+        node = nodes.getNode(self.state)
+        cost = nodes.g[node]
+        path = [self.puzzle.convertToString(self.state)]
+        while nodes.parents[node] != -1:
+            node = nodes.parents[node]
+            path.append(self.puzzle.convertToString(nodes.states[node]))
+        return path, cost
+
+
+    # Returns the tray after the best move from the current tray, None if the current tray is a
+    # goal state or no goal can be reached
+    def getBestMove(self):
+        path, cost = self.solve()
+        return path[1] if path is not None and len(path) > 1 else None
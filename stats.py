@@ -0,0 +1,159 @@
+import cProfile
+import heapq
+import io
+import pstats
+import time
+
+"""
+SearchStats collects counters and timers for one solve of a puzzle, for example
+Puzzle.solve('astar', stats=SearchStats()). It is opt-in: a solve without it runs the usual
+code, and with it the heuristic, convertToString() and getKey() of the puzzle are wrapped for
+the time of the solve to count their calls.
+A* also reports, through the 'stats' attribute of the puzzle, the children found again without
+a lower cost (duplicates), the closed nodes reopened with a lower cost, the high-water mark of
+its priority queue (stale entries included) with its size sampled every 'sample_every'
+expansions, and the time spent in each phase of the search: heuristic (computing h(n)), queue
+(pushing to and popping from the priority queue), bookkeeping (storing and updating nodes) and
+expand (the rest of generating the children).
+A profiler can be given to wrap the solve: any object with enable() and disable() methods, such
+as cProfile.Profile (used with profile=True) or an adapter around a sampling profiler.
+"""
+
+PHASES = ('expand', 'heuristic', 'queue', 'bookkeeping')
+
+
+class SearchStats:
+
+    def __init__(self, sample_every=1000, profile=False, profiler=None):
+        self.algorithm = None                                   #Algorithm of the solve
+        self.expanded = 0                                       #Nodes expanded
+        self.generated = 0                                      #Nodes generated
+        self.duplicates = 0                                     #Children found again without a lower cost (A*)
+        self.reopened = 0                                       #Closed nodes reached again with a lower cost (A*)
+        self.heuristic_calls = 0
+        self.convert_calls = 0                                  #Calls to convertToString()
+        self.key_calls = 0                                      #Calls to getKey()
+        self.frontier_peak = 0                                  #Largest size of the priority queue (A*)
+        self.frontier_sizes = []                                #(nodes expanded, size of the priority queue) (A*)
+        self.sample_every = sample_every
+        self.timers = dict.fromkeys(PHASES, 0.0)                #Seconds spent in every phase (A*)
+        self.elapsed = 0.0                                      #Seconds taken by the whole solve
+        self.profiler = cProfile.Profile() if profile and profiler is None else profiler
+        self.saved = None                                       #Attributes of the puzzle replaced while attached
+        self.started = None
+
+
+    # Starts recording a solve of 'puzzle' by wrapping the methods to count and starting the profiler
+    def attach(self, puzzle, algorithm):
+        self.algorithm = algorithm
+        self.saved = (puzzle.heuristic, puzzle.convertToString, puzzle.getKey)
+        heuristic, convert, get_key = self.saved
+        timers = self.timers
+        clock = time.perf_counter
+
+        def countedHeuristic(state):
+            self.heuristic_calls += 1
+            start = clock()
+            h_n = heuristic(state)
+            timers['heuristic'] += clock() - start
+            return h_n
+
+        def countedConvert(tray):
+            self.convert_calls += 1
+            return convert(tray)
+
+        def countedKey(val, informed=True):
+            self.key_calls += 1
+            return get_key(val, informed)
+
+        puzzle.heuristic = countedHeuristic
+        puzzle.convertToString = countedConvert
+        puzzle.getKey = countedKey
+        puzzle.stats = self
+        if self.profiler is not None:
+            self.profiler.enable()
+        self.started = clock()
+
+
+    # Stops recording the solve and restores the puzzle
+    def detach(self, puzzle):
+        self.elapsed += time.perf_counter() - self.started
+        if self.profiler is not None:
+            self.profiler.disable()
+        puzzle.heuristic = self.saved[0]
+        del puzzle.convertToString
+        del puzzle.getKey
+        puzzle.stats = None
+        self.saved = None
+        self.expanded = puzzle.expanded
+        self.generated = puzzle.generated
+
+
+    # Generates the children of 'parent' in the A* search of 'puzzle' (see Puzzle.expandAStar())
+    # while counting the duplicates and the reopened nodes and timing every phase. The time of the
+    # heuristic is recorded by the wrapped heuristic and is not part of the other phases.
+    def timeExpansion(self, puzzle, parent):
+        timers = self.timers
+        clock = time.perf_counter
+        closed = puzzle.closed
+        add = puzzle.astar.add
+        reparent = puzzle.reparentAStar
+        spent = {'queue': 0.0, 'bookkeeping': 0.0}
+        reparented = [0]
+
+        def timedPush(frontier, entry):
+            start = clock()
+            heapq.heappush(frontier, entry)
+            spent['queue'] += clock() - start
+
+        def timedAdd(*node):
+            start = clock()
+            node_num = add(*node)
+            spent['bookkeeping'] += clock() - start
+            return node_num
+
+        def timedReparent(node_num, parent_num, g_n, cost):
+            start = clock()
+            reparented[0] += 1
+            if puzzle.astar.states[node_num] in closed:
+                self.reopened += 1
+            reparent(node_num, parent_num, g_n, cost)
+            spent['bookkeeping'] += clock() - start
+
+        start = clock()
+        heuristic_time = timers['heuristic']
+        nodes = len(puzzle.astar)
+        puzzle.expandAStar(parent, timedPush, timedAdd, timedReparent)
+        children = len(puzzle.astar_moves[parent & puzzle.blank_mask])
+        self.duplicates += children - (len(puzzle.astar) - nodes) - reparented[0]
+
+        timers['queue'] += spent['queue']
+        timers['bookkeeping'] += spent['bookkeeping']
+        timers['expand'] += clock() - start - spent['queue'] - spent['bookkeeping'] - (timers['heuristic'] - heuristic_time)
+        self.recordFrontier(puzzle.expanded, len(puzzle.frontier))
+
+
+    # Records the size of the priority queue after 'expanded' expansions
+    def recordFrontier(self, expanded, size):
+        if size > self.frontier_peak:
+            self.frontier_peak = size
+        if expanded % self.sample_every == 0:
+            self.frontier_sizes.append((expanded, size))
+
+
+    # Returns the counters and timers as a dictionary, e.g. to be sent to a dashboard
+    def asDict(self):
+        return {'algorithm': self.algorithm, 'expanded': self.expanded, 'generated': self.generated,
+                'duplicates': self.duplicates, 'reopened': self.reopened,
+                'heuristic_calls': self.heuristic_calls, 'convert_calls': self.convert_calls,
+                'key_calls': self.key_calls, 'frontier_peak': self.frontier_peak,
+                'timers': dict(self.timers), 'elapsed': self.elapsed}
+
+
+    # Returns the report of the profiler sorted by 'sort', limited to 'limit' functions
+    def getProfile(self, sort='cumulative', limit=20):
+        if not isinstance(self.profiler, cProfile.Profile):
+            return None
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
@@ -0,0 +1,149 @@
+import struct
+
+"""
+Structured tracing of the searches of the puzzle. A search given a trace sink reports an event
+for every node it generates, expands, re-parents (reaches again with a lower cost) or finds to
+be a goal. Every event carries the node number, the node number of the parent, the packed state
+of the node (see Puzzle.encodeTray()) and the cost g(n) to reach it. Before the first event of a
+search the sink is told the initial tray and hop length, from which the packed states can be
+decoded again with Puzzle(tray, max_hop).convertToString(state).
+Searches without a sink only test a local variable per event. Sinks buffer their output, so the
+trace of a large search costs a tuple or a few bytes per event.
+"""
+
+START = 'start'
+GENERATED = 'generated'
+EXPANDED = 'expanded'
+GOAL = 'goal'
+REPARENT = 'reparent'
+EVENT_CODES = {START: 0, GENERATED: 1, EXPANDED: 2, GOAL: 3, REPARENT: 4}
+
+
+class TraceSink:
+
+    # Called before the first event of a search
+    def start(self, puzzle, algorithm):
+        pass
+
+
+    # Records one event
+    def emit(self, event, node, parent, state, g):
+        pass
+
+
+    # Writes the buffered events
+    def flush(self):
+        pass
+
+
+    # Writes the buffered events and releases the sink
+    def close(self):
+        self.flush()
+
+
+"""
+MemorySink keeps the events as (event, node, parent, state, g) tuples in a list, and the
+searches as (tray, max_hop, algorithm) tuples.
+"""
+class MemorySink(TraceSink):
+
+    def __init__(self):
+        self.searches = []
+        self.events = []
+
+
+    def start(self, puzzle, algorithm):
+        self.searches.append((puzzle.convertToString(puzzle.start), puzzle.max_hop, algorithm))
+
+
+    def emit(self, event, node, parent, state, g):
+        self.events.append((event, node, parent, state, g))
+
+
+"""
+JsonlSink writes one JSON object per line to a file: {"event", "tray", "max_hop", "algorithm"}
+when a search starts and {"event", "node", "parent", "state", "g"} for every event.
+"""
+class JsonlSink(TraceSink):
+
+    def __init__(self, path, buffer_size=10000):
+        import json
+        self.dumps = json.dumps                                 #Imported here to keep the import of the puzzle fast
+        self.file = open(path, 'w')
+        self.buffer = []
+        self.buffer_size = buffer_size
+
+
+    def start(self, puzzle, algorithm):
+        self.buffer.append(self.dumps({'event': START, 'tray': puzzle.convertToString(puzzle.start),
+                                       'max_hop': puzzle.max_hop, 'algorithm': algorithm}))
+
+
+    def emit(self, event, node, parent, state, g):
+        self.buffer.append('{"event": "%s", "node": %d, "parent": %d, "state": %d, "g": %d}' % (event, node, parent, state, g))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+
+    def flush(self):
+        if self.buffer:
+            self.file.write('\n'.join(self.buffer) + '\n')
+            self.buffer = []
+
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+"""
+BinarySink writes fixed size little-endian records (see RECORD): the event code, the node number,
+the parent node number, the packed state and g(n). When a search starts a record is written with
+the START code, the length of the tray as node number, the hop length as parent and the packed
+initial state. readBinaryTrace() reads such a file back.
+The packed state is stored in 64 bits, which holds trays of up to 29 cells; longer trays can be
+traced with JsonlSink.
+"""
+RECORD = struct.Struct('<BqqQi')
+STATE_BITS = 64                                                 #Bits of the packed state in a record
+
+
+class BinarySink(TraceSink):
+
+    def __init__(self, path, buffer_size=1 << 20):
+        self.file = open(path, 'wb')
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+
+
+    # Raises a ValueError if the packed states of 'puzzle' do not fit in a record
+    def start(self, puzzle, algorithm):
+        if puzzle.blank_bits + 2 * puzzle.n > STATE_BITS:
+            raise ValueError('The states of a tray of {} cells do not fit in a binary trace record, use JsonlSink'.format(puzzle.n))
+        self.buffer += RECORD.pack(EVENT_CODES[START], puzzle.n, puzzle.max_hop, puzzle.start, 0)
+
+
+    def emit(self, event, node, parent, state, g):
+        self.buffer += RECORD.pack(EVENT_CODES[event], node, parent, state, g)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+# Yields the (event, node, parent, state, g) records of a file written by BinarySink
+def readBinaryTrace(path):
+    events = {code: event for event, code in EVENT_CODES.items()}
+    with open(path, 'rb') as f:
+        data = f.read()
+    for code, node, parent, state, g in RECORD.iter_unpack(data):
+        yield events[code], node, parent, state, g
@@ -0,0 +1,114 @@
+import math
+
+import numpy as np
+
+"""
+VectorBFS explores the whole state space reachable from the initial state of a Puzzle layer by
+layer with NumPy. Every layer of the frontier is an array of packed states (see
+Puzzle.encodeTray()) and all the children of a layer are built at once from the move tables of
+the puzzle laid out as arrays indexed by the position of the empty space. The children are ranked
+(see Puzzle.rankState()) with array operations and the duplicates are removed against a visited
+bitmap indexed by rank, so no Python code runs per state. As packed states are ordered like the
+trays they encode, removing the duplicates of a layer by sorting its packed states also sorts it
+by rank.
+NumPy is only needed by this module, the rest of the puzzle works without it. Packed states are
+kept as signed 64 bit integers, which holds trays of up to 29 cells.
+"""
+
+
+class VectorBFS:
+
+    def __init__(self, puzzle):
+        if puzzle.blank_bits + 2 * puzzle.n > 63:
+            raise ValueError('The tray is too long to be packed into 64 bits')
+
+        self.puzzle = puzzle
+        self.state_count = puzzle.getStateCount()
+        self.layers = []                                        #Number of states in every layer
+        self.depth = None                                       #Layer of every state indexed by rank, -1 if not reached
+        self.goal_depth = None                                  #First layer holding a goal state
+
+        # Move tables as arrays of shape (positions of the empty space, moves), the missing
+        # moves of a position being marked as not valid
+        width = max(len(moves) for moves in puzzle.astar_moves)
+        self.valid = np.zeros((puzzle.n, width), dtype=bool)
+        self.shifts = np.zeros((puzzle.n, width), dtype=np.int64)
+        self.masks = np.zeros((3, puzzle.n, width), dtype=np.int64)
+        self.deltas = np.zeros((puzzle.n, width), dtype=np.int64)
+        for empty, moves in enumerate(puzzle.astar_moves):
+            for k, (shift, masks, delta, cost) in enumerate(moves):
+                self.valid[empty, k] = True
+                self.shifts[empty, k] = shift
+                self.masks[:, empty, k] = masks
+                self.deltas[empty, k] = delta
+
+        self.goals = np.array(puzzle.goal_codes, dtype=np.int64)
+        self.rank_table = self.buildRankTable()
+
+
+    # Precomputes the term added to the rank of a state by every cell, which only depends on the
+    # index of the cell, whether the empty space was seen before it, the number of black tiles
+    # before it and its code. The table has shape (n, 2 * (blacks + 1) * 3) so that the row of
+    # a cell is indexed by (seen * (blacks + 1) + blacks before) * 3 + code.
+    def buildRankTable(self):
+        puzzle = self.puzzle
+        table = np.zeros((puzzle.n, 2, puzzle.blacks + 1, 3), dtype=np.int64)
+        for i in range(puzzle.n):
+            remaining = puzzle.n - i
+            for seen in range(2):
+                for blacks in range(puzzle.blacks + 1):
+                    counts = [1 - seen, puzzle.blacks - blacks, puzzle.whites - (i - seen - blacks)]
+                    if counts[2] < 0 or counts[2] > puzzle.whites:
+                        continue
+                    total = math.factorial(remaining) // (math.factorial(counts[0]) * math.factorial(counts[1]) * math.factorial(counts[2]))
+                    for code in range(3):
+                        table[i, seen, blacks, code] = sum(total * counts[smaller] // remaining for smaller in range(code))
+        return table.reshape(puzzle.n, -1)
+
+
+    # Returns the ranks of an array of packed states
+    def rankStates(self, states):
+        row = np.zeros(len(states), dtype=np.int64)         #(seen * (blacks + 1) + blacks before) * 3
+        rank = np.zeros(len(states), dtype=np.int64)
+        seen_step = 3 * (self.puzzle.blacks + 1)
+        for i, shift in enumerate(self.puzzle.cell_shifts):
+            codes = (states >> shift) & 3
+            rank += self.rank_table[i][row + codes]
+            row += np.where(codes == 0, seen_step, 0) + np.where(codes == 1, 3, 0)
+        return rank
+
+
+    # Returns the children of an array of packed states (with repetitions)
+    def expandLayer(self, states):
+        empty = states & self.puzzle.blank_mask
+        rows, moves = np.nonzero(self.valid[empty])
+        parents = states[rows]
+        empty = empty[rows]
+        codes = (parents >> self.shifts[empty, moves]) & 3
+        return (parents ^ self.masks[codes, empty, moves]) + self.deltas[empty, moves]
+
+
+    # Explores every state reachable from the initial state and returns the number of states
+    # in every layer. With 'record_depth' the layer of every state is kept in self.depth.
+    def run(self, record_depth=True):
+        visited = np.zeros((self.state_count + 7) // 8, dtype=np.uint8)
+        self.depth = np.full(self.state_count, -1, dtype=np.int32) if record_depth else None
+        self.layers = []
+        self.goal_depth = None
+
+        layer = np.array([self.puzzle.start], dtype=np.int64)
+        ranks = self.rankStates(layer)
+        while len(layer):
+            np.bitwise_or.at(visited, ranks >> 3, (1 << (ranks & 7)).astype(np.uint8))
+            if record_depth:
+                self.depth[ranks] = len(self.layers)
+            if self.goal_depth is None and np.any(self.goals[layer & self.puzzle.blank_mask] == layer):
+                self.goal_depth = len(self.layers)
+            self.layers.append(len(layer))
+
+            children = np.unique(self.expandLayer(layer))
+            child_ranks = self.rankStates(children)
+            new = (visited[child_ranks >> 3] >> (child_ranks & 7)) & 1 == 0
+            layer = children[new]
+            ranks = child_ranks[new]
+        return self.layers